@@ -0,0 +1,177 @@
+'''
+Linux counter reader for the UNRAID status screen.
+Reads the counters main.py turns into rates straight from /proc and /sys.
+psutil reopens and parses the whole file (and builds namedtuples) on every call; here each file
+is opened once, then every sample is a seek(0) and a single read into a buffer we keep around,
+and only the fields the plots actually use get parsed.
+Anything that can't be read is left out so main.py can get it from psutil instead.
+Optional: if this file is missing or we're not on Linux, main.py uses psutil for everything.
+by: WeegeeNumbuh1
+'''
+import glob
+import os
+
+SECTOR_SIZE: int = 512
+''' /proc/diskstats always counts in 512-byte sectors, whatever the disk actually uses '''
+HWMON_PATHS: tuple = ('/sys/class/hwmon/hwmon*/temp*_input', '/sys/class/hwmon/hwmon*/device/temp*_input')
+THERMAL_ZONE_PATH: str = '/sys/class/thermal/thermal_zone*'
+NIC_DOWN_STATES: tuple = (b'down', b'lowerlayerdown', b'notpresent')
+''' operstate values that mean the interface is down. Virtual interfaces often report "unknown" while working fine. '''
+
+class ProcFile:
+    ''' A /proc or /sys file that stays open and gets read whole into the same buffer every time. '''
+
+    def __init__(self, path: str, size: int = 4096):
+        self.file = open(path, 'rb', buffering=0)
+        self.buffer = bytearray(size)
+
+    def read(self) -> bytes:
+        '''
+        Returns the current contents of the file. /proc files are generated on each read,
+        so one read from the start is enough as long as the buffer is big enough.
+        '''
+        while True:
+            self.file.seek(0)
+            length = self.file.readinto(self.buffer)
+            if length < len(self.buffer):
+                return bytes(memoryview(self.buffer)[:length])
+            self.buffer = bytearray(len(self.buffer) * 2) # didn't fit, grow and try again
+
+    def close(self) -> None:
+        self.file.close()
+
+class ProcReader:
+    '''
+    Keeps our counter files open and reads them on demand.
+    `network_interface` limits the network counters to one interface (and lets us check if it's up),
+    otherwise all interfaces are added together, same as psutil.net_io_counters().
+    '''
+
+    def __init__(self, network_interface: str = None):
+        self.network_interface = network_interface
+        self.clock_ticks = os.sysconf('SC_CLK_TCK')
+        self.files: dict = {}
+        for name, path in (('cpu', '/proc/stat'), ('disk', '/proc/diskstats'), ('net', '/proc/net/dev')):
+            try:
+                self.files[name] = ProcFile(path)
+            except OSError:
+                pass
+        if network_interface is not None:
+            try:
+                self.files['nic_isup'] = ProcFile(f"/sys/class/net/{network_interface}/operstate", 64)
+            except OSError:
+                pass
+        # Only whole disks count towards disk I/O, otherwise partitions get counted twice.
+        # Same rule as psutil.disk_io_counters(): anything listed in /sys/block.
+        try:
+            self.disks = set(disk.replace('!', '/') for disk in os.listdir('/sys/block'))
+        except OSError:
+            self.disks = set()
+            self.close('disk')
+
+    def close(self, name: str) -> None:
+        ''' Stops using a file, so its readings come from psutil from now on. '''
+        if name in self.files:
+            self.files.pop(name).close()
+
+    def read(self) -> dict:
+        '''
+        Returns whichever of these we can read, in the same form as main.take_snapshot():
+        - 'cpu': (busy, total) CPU time in seconds
+        - 'cores': [(busy, total), ...] for each core
+        - 'disk': (read bytes, written bytes)
+        - 'net': (received bytes, sent bytes)
+        - 'nic_isup': True/False
+        '''
+        readings = {}
+        for name, parser in (('cpu', self._cpu), ('disk', self._disk), ('net', self._net), ('nic_isup', self._nic_isup)):
+            if name not in self.files:
+                continue
+            try:
+                parser(self.files[name].read(), readings)
+            except (OSError, ValueError, IndexError):
+                self.close(name)
+        return readings
+
+    def _cpu_times(self, fields: list) -> tuple:
+        ''' Same busy/total split as psutil.cpu_percent(): guest time is already in user time, iowait counts as idle. '''
+        times = [int(field) for field in fields[1:11]]
+        total = sum(times[:8]) # user nice system idle iowait irq softirq steal
+        busy = total - times[3] - times[4]
+        return busy / self.clock_ticks, total / self.clock_ticks
+
+    def _cpu(self, data: bytes, readings: dict) -> None:
+        cores = []
+        for line in data.split(b'\n'):
+            if not line.startswith(b'cpu'):
+                break # the cpu lines always come first
+            fields = line.split()
+            if fields[0] == b'cpu':
+                readings['cpu'] = self._cpu_times(fields)
+            else:
+                cores.append(self._cpu_times(fields))
+        if 'cpu' not in readings:
+            raise ValueError("No CPU times found.")
+        readings['cores'] = cores
+
+    def _disk(self, data: bytes, readings: dict) -> None:
+        sectors_read = sectors_written = 0
+        for line in data.splitlines():
+            fields = line.split(None, 3) # major, minor, name, everything else
+            if len(fields) < 4 or fields[2].decode() not in self.disks:
+                continue
+            stats = fields[3].split()
+            sectors_read += int(stats[2])
+            sectors_written += int(stats[6])
+        readings['disk'] = (sectors_read * SECTOR_SIZE, sectors_written * SECTOR_SIZE)
+
+    def _net(self, data: bytes, readings: dict) -> None:
+        received = sent = 0
+        found = False
+        for line in data.splitlines()[2:]: # skip the two header lines
+            name, _, counters = line.partition(b':')
+            if self.network_interface is not None and name.strip().decode() != self.network_interface:
+                continue
+            fields = counters.split()
+            received += int(fields[0])
+            sent += int(fields[8])
+            found = True
+        if found == False:
+            raise ValueError("Network interface not found.")
+        readings['net'] = (received, sent)
+
+    def _nic_isup(self, data: bytes, readings: dict) -> None:
+        readings['nic_isup'] = data.strip() not in NIC_DOWN_STATES
+
+def temperature_sensors() -> dict:
+    '''
+    Finds every temperature sensor once and maps its name to the file that
+    psutil.sensors_temperatures()[name][0] would be read from, in the same order psutil goes through them.
+    Reading that one file each sample is much cheaper than psutil reading every sensor on the system.
+    Returns an empty dict if there's nothing to read (or we're not on Linux).
+    '''
+    index = {}
+    inputs = []
+    for pattern in HWMON_PATHS:
+        inputs.extend(glob.glob(pattern))
+    for path in sorted(inputs, key=lambda path: path.split('_')[0]):
+        try:
+            with open(path, 'rb') as reading:
+                int(reading.read())
+            with open(os.path.join(os.path.dirname(path), 'name')) as name:
+                index.setdefault(name.read().strip(), path)
+        except (OSError, ValueError):
+            continue
+    if inputs:
+        return index
+    # no hwmon sensors at all, psutil falls back to thermal zones
+    for zone in sorted(glob.glob(THERMAL_ZONE_PATH)):
+        try:
+            path = os.path.join(zone, 'temp')
+            with open(path, 'rb') as reading:
+                int(reading.read())
+            with open(os.path.join(zone, 'type')) as name:
+                index.setdefault(name.read().strip(), path)
+        except (OSError, ValueError):
+            continue
+    return index
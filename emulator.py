@@ -0,0 +1,213 @@
+'''
+ILI9341 emulator for the UNRAID status screen.
+Stands in for adafruit_rgb_display's ILI9341 driver: the command stream main.py sends is interpreted
+(CASET/PASET/RAMWR, MADCTL and so on) into an in-memory copy of the panel, and every byte, command and
+SPI transaction is counted. From those we work out how long the transfers would take at a given baud rate,
+so changes to the display path can be measured without an FT232H or a screen attached.
+Optional: only needed for DISPLAY: emulator.
+by: WeegeeNumbuh1
+'''
+import struct
+import numpy as np
+
+PANEL_WIDTH: int = 240
+PANEL_HEIGHT: int = 320
+''' Size of the panel's memory, in its native portrait orientation '''
+TRANSACTION_OVERHEAD: float = 125e-6
+''' Time (seconds) each SPI transaction costs on top of its bytes. Through the FT232H that's about one USB microframe. '''
+
+# commands we act on, everything else is only counted
+SWRESET: int = 0x01
+SLPOUT: int = 0x11
+DISPON: int = 0x29
+CASET: int = 0x2A
+PASET: int = 0x2B
+RAMWR: int = 0x2C
+MADCTL: int = 0x36
+WRMEMC: int = 0x3C
+
+# MADCTL bits
+MADCTL_MY: int = 0x80
+MADCTL_MX: int = 0x40
+MADCTL_MV: int = 0x20
+
+COMMAND_NAMES: dict = {SWRESET: "SWRESET", SLPOUT: "SLPOUT", DISPON: "DISPON", CASET: "CASET",
+                       PASET: "PASET", RAMWR: "RAMWR", MADCTL: "MADCTL", WRMEMC: "WRMEMC", 0x3A: "PIXSET"}
+
+INIT_SEQUENCE: tuple = (
+    (0xEF, b"\x03\x80\x02"),
+    (0xCF, b"\x00\xc1\x30"),
+    (0xED, b"\x64\x03\x12\x81"),
+    (0xE8, b"\x85\x00\x78"),
+    (0xCB, b"\x39\x2c\x00\x34\x02"),
+    (0xF7, b"\x20"),
+    (0xEA, b"\x00\x00"),
+    (0xC0, b"\x23"),
+    (0xC1, b"\x10"),
+    (0xC5, b"\x3e\x28"),
+    (0xC7, b"\x86"),
+    (MADCTL, b"\x48"),
+    (0x3A, b"\x55"),
+    (0xB1, b"\x00\x18"),
+    (0xB6, b"\x08\x82\x27"),
+    (0xF2, b"\x00"),
+    (0x26, b"\x01"),
+    (0xE0, b"\x0f\x31\x2b\x0c\x0e\x08\x4e\xf1\x37\x07\x10\x03\x0e\x09\x00"),
+    (0xE1, b"\x00\x0e\x14\x03\x11\x07\x31\xc1\x48\x08\x0f\x0c\x31\x36\x0f"),
+    (SLPOUT, None),
+    (DISPON, None),
+)
+''' Same start-up sequence adafruit_rgb_display sends, so the counts match what the hardware sees '''
+
+class ILI9341Emulator:
+    '''
+    Has the parts of adafruit_rgb_display.ili9341.ILI9341 main.py uses (width, height, write(), _block(), image()),
+    and sends the same bytes it would: each write() is one SPI transaction for the command and another for the data.
+    `panel` holds what the screen would show, as RGB565 values in portrait orientation the way you'd look at it
+    with IMAGE_ROTATION: 0 (the way the display is mounted with MADCTL 0x48).
+    '''
+
+    def __init__(self, baudrate: int = 24000000, transaction_overhead: float = TRANSACTION_OVERHEAD):
+        self.baudrate = baudrate
+        self.transaction_overhead = transaction_overhead
+        self.width = PANEL_WIDTH
+        self.height = PANEL_HEIGHT
+        self.panel = np.zeros((PANEL_HEIGHT, PANEL_WIDTH), dtype=np.uint16)
+        self.reset_counters()
+        self.init()
+
+    def reset_counters(self) -> None:
+        ''' Zeroes everything we count. The panel and the controller's state are kept. '''
+        self.bytes = 0
+        ''' every byte sent, commands included '''
+        self.commands = 0
+        self.transactions = 0
+        ''' times chip select would be asserted '''
+        self.pixels = 0
+        ''' pixels written into the panel's memory '''
+        self.command_counts: dict = {}
+
+    def init(self) -> None:
+        ''' Resets the controller then sends the start-up sequence, like the real driver does. '''
+        self.write(SWRESET)
+        for command, data in INIT_SEQUENCE:
+            self.write(command, data)
+
+    @property
+    def simulated_time(self) -> float:
+        ''' Seconds everything counted so far would take on the wire at our baud rate '''
+        return self.bytes * 8 / self.baudrate + self.transactions * self.transaction_overhead
+
+    def write(self, command: int = None, data=None) -> None:
+        ''' Same as DisplaySPI.write(): an optional command byte, then optional data, each in its own transaction. '''
+        if command is not None:
+            self.bytes += 1
+            self.commands += 1
+            self.transactions += 1
+            self.command_counts[command] = self.command_counts.get(command, 0) + 1
+            self._command(command)
+        if data is not None:
+            data = memoryview(data).cast('B')
+            self.bytes += len(data)
+            self.transactions += 1
+            self._data(data)
+
+    def _command(self, command: int) -> None:
+        self.current = command
+        self.parameters = bytearray()
+        if command == SWRESET:
+            self.madctl = 0x00
+            self.columns = (0, PANEL_WIDTH - 1)
+            self.pages = (0, PANEL_HEIGHT - 1)
+            self.sleeping = True
+            self.display_on = False
+            self.pointer = 0
+            self.leftover = b''
+        elif command == SLPOUT:
+            self.sleeping = False
+        elif command == DISPON:
+            self.display_on = True
+        elif command == RAMWR:
+            self.pointer = 0
+            self.leftover = b''
+        elif command == WRMEMC:
+            self.leftover = b''
+
+    def _data(self, data: memoryview) -> None:
+        if self.current in (RAMWR, WRMEMC):
+            self._memory_write(data)
+            return
+        self.parameters += data
+        if self.current == CASET and len(self.parameters) >= 4:
+            self.columns = struct.unpack('>HH', self.parameters[:4])
+        elif self.current == PASET and len(self.parameters) >= 4:
+            self.pages = struct.unpack('>HH', self.parameters[:4])
+        elif self.current == MADCTL and len(self.parameters) >= 1:
+            self.madctl = self.parameters[0]
+
+    def _memory_write(self, data: memoryview) -> None:
+        '''
+        Writes pixels from the current position of the window set by CASET/PASET, going across then down
+        and starting over at the top when the window is full. Pixels outside the panel are dropped.
+        '''
+        if self.leftover: # a pixel split across two writes
+            data = self.leftover + bytes(data)
+        length = len(data) - (len(data) % 2)
+        self.leftover = bytes(data[length:])
+        if length == 0:
+            return
+        values = np.frombuffer(data, dtype='>u2', count=length // 2)
+        x0, x1 = self.columns
+        y0, y1 = self.pages
+        if x1 < x0 or y1 < y0:
+            return
+        window_width = x1 - x0 + 1
+        window_size = window_width * (y1 - y0 + 1)
+        index = (self.pointer + np.arange(values.size)) % window_size
+        self.pointer = (self.pointer + values.size) % window_size
+        x = x0 + index % window_width
+        y = y0 + index // window_width
+        # what the addresses mean depends on MADCTL, turn them into panel rows and columns.
+        # The panel is mounted mirrored, so our "no mirroring" is MADCTL_MX set (0x48 is the driver default)
+        flags = self.madctl ^ MADCTL_MX
+        if flags & MADCTL_MV:
+            column, row = y, x
+        else:
+            column, row = x, y
+        if flags & MADCTL_MX:
+            column = PANEL_WIDTH - 1 - column
+        if flags & MADCTL_MY:
+            row = PANEL_HEIGHT - 1 - row
+        inside = (column >= 0) & (column < PANEL_WIDTH) & (row >= 0) & (row < PANEL_HEIGHT)
+        self.panel[row[inside], column[inside]] = values[inside]
+        self.pixels += int(np.count_nonzero(inside))
+
+    def _block(self, x0: int, y0: int, x1: int, y1: int, data=None) -> None:
+        ''' Same as Display._block(): set the window, then write the pixels into it. '''
+        self.write(CASET, struct.pack('>HH', x0, x1))
+        self.write(PASET, struct.pack('>HH', y0, y1))
+        self.write(RAMWR, data)
+
+    def image(self, image, rotation: int = None, x: int = 0, y: int = 0) -> None:
+        ''' Same as Display.image(), minus the rotation (main.py leaves that to MADCTL). '''
+        rgb = np.asarray(image.convert('RGB')).astype(np.uint16)
+        pixels = (((rgb[..., 0] & 0xF8) << 8) | ((rgb[..., 1] & 0xFC) << 3) | (rgb[..., 2] >> 3)).astype('>u2')
+        height, width = pixels.shape
+        if x + width > self.width or y + height > self.height:
+            raise ValueError(f"Image must not exceed dimensions of display ({self.width}x{self.height}).")
+        self._block(x, y, x + width - 1, y + height - 1, pixels.tobytes())
+
+    def panel_rgb(self) -> np.ndarray:
+        ''' The panel as 8-bit RGB, ready for Image.fromarray() '''
+        rgb = np.empty(self.panel.shape + (3,), dtype=np.uint8)
+        rgb[..., 0] = ((self.panel >> 11) & 0x1F) * 255 // 31
+        rgb[..., 1] = ((self.panel >> 5) & 0x3F) * 255 // 63
+        rgb[..., 2] = (self.panel & 0x1F) * 255 // 31
+        return rgb
+
+    def summary(self) -> str:
+        ''' The counters in one line, commands by name '''
+        counts = ", ".join(f"{COMMAND_NAMES.get(command, hex(command))}: {count}"
+                           for command, count in sorted(self.command_counts.items()))
+        return f"{self.bytes} bytes, {self.transactions} transactions, {self.pixels} pixels, \
+{round(self.simulated_time * 1000, 2)}ms at {self.baudrate / 1e6}MHz ({counts})"
@@ -0,0 +1,478 @@
+'''
+Matplotlib-free render engine for the UNRAID status screen.
+Draws the same five panels as the matplotlib figure in main.py (line plots, core heatmap,
+array/memory bars and the text overlays) straight into a preallocated NumPy RGB buffer.
+Lines are rasterized a whole plot at a time with NumPy and text is drawn with PIL.
+Selected with `RENDER_BACKEND: numpy` in settings.yaml.
+by: WeegeeNumbuh1
+'''
+import importlib.util
+from pathlib import Path
+import numpy as np
+from PIL import Image, ImageColor, ImageDraw, ImageFont
+
+DPI: int = 100
+''' Same as the matplotlib figure, used to turn font sizes and line widths from points into pixels. '''
+
+# Colors from the matplotx ayu dark style that the matplotlib backend uses
+BACKGROUND: tuple = (0x0F, 0x14, 0x19)
+FOREGROUND: tuple = (0xE6, 0xE1, 0xCF)
+LINE_COLORS: tuple = ('#36A3D9', '#FFB454', '#95E6CB', '#F07178', '#5C6773', '#FFEE99')
+
+# Same layout as main.py: plt.subplots() with these height ratios, then fig.subplots_adjust()
+HEIGHT_RATIOS: tuple = (4, 1, 4, 4, 2)
+MARGINS: tuple = (0.0, 0.12, 1, 0.98) # left, bottom, right, top
+HSPACE: float = 0.2
+
+FONT_SIZE: float = 7
+''' Default font size in points, same as main.py's rcParams '''
+TICK_PAD: float = 20
+''' Tick labels sit this many points inside the plot (matplotlib's pad=-20) '''
+TICK_SIZE: float = 3.5
+''' Tick mark length in points '''
+TEXT_CACHE_SIZE: int = 256
+''' How many rendered strings we keep around. Most of our text (ticks, titles, labels) is the same every frame. '''
+
+DASH_PATTERNS: dict = {
+    '-': None,
+    'solid': None,
+    '--': (3.7, 1.6),
+    'dashed': (3.7, 1.6),
+    ':': (1.0, 1.65),
+    'dotted': (1.0, 1.65),
+    '-.': (6.4, 1.6, 1.0, 1.6),
+    'dashdot': (6.4, 1.6, 1.0, 1.6),
+}
+''' On/off lengths in points, same as matplotlib's defaults for a 1pt line. '''
+
+FONT_FILES: dict = {
+    'normal': 'DejaVuSans.ttf',
+    'bold': 'DejaVuSans-Bold.ttf',
+    'italic': 'DejaVuSans-Oblique.ttf',
+    'mono': 'DejaVuSansMono.ttf',
+}
+
+def points_to_pixels(points: float) -> float:
+    return points * DPI / 72
+
+def font_dirs() -> list:
+    ''' Where to look for our fonts: matplotlib's bundled copies if it's installed (without importing it), then the system. '''
+    dirs = []
+    spec = importlib.util.find_spec('matplotlib')
+    if spec is not None and spec.origin is not None:
+        dirs.append(Path(spec.origin).parent / 'mpl-data' / 'fonts' / 'ttf')
+    return dirs
+
+def load_font(kind: str, size: float):
+    ''' Loads a DejaVu font face at `size` points, falling back to PIL's built-in font. '''
+    pixels = max(1, round(points_to_pixels(size)))
+    filename = FONT_FILES[kind]
+    for directory in font_dirs():
+        try:
+            return ImageFont.truetype(str(directory / filename), pixels)
+        except OSError:
+            pass
+    try:
+        return ImageFont.truetype(filename, pixels) # searches the system font directories
+    except OSError:
+        pass
+    try:
+        return ImageFont.load_default(pixels) # Pillow 10.1 or newer
+    except TypeError:
+        return ImageFont.load_default()
+
+def nice_ticks(low: float, high: float, max_ticks: int = 4) -> np.ndarray:
+    ''' Evenly spaced ticks on 1/2/2.5/5 x 10^n steps between low and high, like matplotlib's AutoLocator. '''
+    span = high - low
+    if span <= 0 or not np.isfinite(span):
+        return np.array([low])
+    raw_step = span / max_ticks
+    magnitude = 10 ** np.floor(np.log10(raw_step))
+    for multiple in (1, 2, 2.5, 5, 10):
+        step = multiple * magnitude
+        if span / step <= max_ticks:
+            break
+    first = np.ceil(low / step) * step
+    return np.arange(first, high + step * 1e-6, step)
+
+def tick_label(value: float) -> str:
+    if float(value).is_integer():
+        return str(int(value))
+    return f"{value:g}"
+
+def gist_heat(values: np.ndarray) -> np.ndarray:
+    ''' matplotlib's gist_heat colormap for values between 0 and 1, as RGB uint8. '''
+    values = np.clip(values, 0, 1)[..., None]
+    rgb = np.clip(values * np.array([1.5, 2.0, 4.0]) - np.array([0.0, 1.0, 3.0]), 0, 1)
+    return (rgb * 255).astype(np.uint8)
+
+def blend(region: np.ndarray, mask: np.ndarray, color: np.ndarray, alpha: float) -> None:
+    ''' Paints `color` over the pixels of `region` in `mask` with `alpha` opacity. '''
+    region[mask] = (region[mask] * (1 - alpha) + color * alpha).astype(np.uint8)
+
+class Renderer:
+    '''
+    Renders our status screen into `frame`, a (height, width, 3) uint8 RGB array.
+    Set the strings in `texts` (same names as the annotations in main.py) then call render().
+    With `strip_chart` the lines scroll like a strip chart recorder: each frame the last frame's lines
+    are shifted over and only the newest part is drawn (see _strip()).
+    '''
+    def __init__(self, width: int, height: int, plot_config: tuple, barplot_colors: list,
+                 x_span: float, debug: bool = False, strip_chart: bool = False) -> None:
+        self.width = width
+        self.height = height
+        self.plot_config = plot_config
+        self.x_span = x_span
+        self.debug = debug
+        self.strip_chart = strip_chart
+        self._strips: dict = {}
+        ''' per plot: the lines on their own, the pixels they cover, and where they were drawn, see _strip() '''
+        self.frame = np.zeros((height, width, 3), dtype=np.uint8)
+        self._background = np.empty_like(self.frame)
+        self._background[:] = BACKGROUND
+        self.boxes = self._layout()
+        self.bar_colors = [ImageColor.getrgb(color)[:3] for color in barplot_colors]
+        self.ylims: list = [plot.get('ylim') for plot in plot_config]
+        self.line_styles = self._line_styles()
+        self.fonts = {
+            'text': load_font('bold', FONT_SIZE),
+            'regular': load_font('normal', FONT_SIZE),
+            'small': load_font('normal', 6),
+            'mono': load_font('mono', 6),
+            'mono_small': load_font('mono', 5),
+            'tick': load_font('normal', 5),
+            'title': load_font('italic', 10),
+        }
+        self.text_layout = self._text_layout()
+        self.texts: dict = {name: '' for name in self.text_layout}
+        self._text_cache: dict = {}
+        self._foreground = np.array(FOREGROUND, dtype=np.float32)
+        self._static = None
+        self._underlay = None
+        ''' the last frame without its text (everything but host, unraid_ver and plot_settings), see render_text() '''
+
+    def _layout(self) -> list:
+        ''' Pixel boxes (x, y, width, height) of our five plots, computed the same way as matplotlib's GridSpec. '''
+        left, bottom, right, top = MARGINS
+        total_height = (top - bottom) * self.height
+        rows = len(HEIGHT_RATIOS)
+        cell = total_height / (rows + HSPACE * (rows - 1))
+        gap = HSPACE * cell
+        y = (1 - top) * self.height
+        boxes = []
+        for ratio in HEIGHT_RATIOS:
+            cell_height = ratio * cell * rows / sum(HEIGHT_RATIOS)
+            boxes.append((round(left * self.width), round(y), round((right - left) * self.width), round(cell_height)))
+            y += cell_height + gap
+        return boxes
+
+    def _line_styles(self) -> list:
+        ''' Turns each line's config into (color, alpha, width in pixels, dash mask) '''
+        styles = []
+        for plot in self.plot_config:
+            plot_styles = []
+            for index, line in enumerate(plot['line_config']):
+                color = ImageColor.getrgb(line.get('color', LINE_COLORS[index % len(LINE_COLORS)]))[:3]
+                width_px = max(1, round(points_to_pixels(line.get('width', 1.5))))
+                pattern = DASH_PATTERNS.get(line.get('style', '-'), None)
+                dash_mask = None
+                if pattern is not None:
+                    lengths = [max(1, round(points_to_pixels(length))) for length in pattern]
+                    dash_mask = np.concatenate([np.full(length, i % 2 == 0) for i, length in enumerate(lengths)])
+                plot_styles.append((np.array(color, dtype=np.float32), float(line.get('alpha', 1)), width_px, dash_mask))
+            styles.append(plot_styles)
+        return styles
+
+    def _text_layout(self) -> dict:
+        '''
+        Where our text goes, mirroring the annotations in main.py:
+        name: (plot, (x, y) in axes fraction, horizontal, vertical, font, alpha, bbox)
+        '''
+        layout = {
+            'host': (0, (0.5, 1), 'center', 'center', 'mono_small', 0.5, False),
+            'cpu': (0, (0.5, 0.3), 'center', 'center', 'text', 1, True),
+            'uptime': (2, (0.5, 1.1), 'center', 'top', 'regular', 1, False),
+            'disk': (2, (0.5, 0.3), 'center', 'center', 'text', 1, True),
+            'network': (3, (0.5, 0.3), 'center', 'center', 'text', 1, True),
+            'memory': (4, (0.5, 0.725), 'center', 'center', 'text', 1, False),
+            'storage': (4, (0.5, 0.225), 'center', 'center', 'text', 1, False),
+        }
+        if self.debug == True:
+            layout.update({
+                'unraid_ver': (4, (0, -0.2), 'left', 'top', 'small', 0.5, False),
+                'plot_settings': (4, (0, -0.5), 'left', 'top', 'small', 0.5, False),
+                'debug': (4, (1, -0.5), 'right', 'top', 'mono', 0.5, False),
+                'frame_number': (4, (1, -0.25), 'right', 'top', 'mono_small', 0.5, False),
+            })
+        return layout
+
+    def _axes_point(self, plot: int, fraction: tuple) -> tuple:
+        x, y, width, height = self.boxes[plot]
+        return x + fraction[0] * width, y + (1 - fraction[1]) * height
+
+    def _text_mask(self, font_name: str, text: str) -> np.ndarray:
+        ''' Coverage of the rendered text from 0 to 1, trimmed to its bounding box. '''
+        key = (font_name, text)
+        mask = self._text_cache.get(key)
+        if mask is None:
+            font = self.fonts[font_name]
+            left, top, right, bottom = font.getbbox(text)
+            image = Image.new('L', (max(right - left, 1), max(bottom - top, 1)))
+            ImageDraw.Draw(image).text((-left, -top), text, font=font, fill=255)
+            mask = np.asarray(image, dtype=np.float32)[..., None] / 255
+            if len(self._text_cache) >= TEXT_CACHE_SIZE:
+                self._text_cache.clear()
+            self._text_cache[key] = mask
+        return mask
+
+    def _text_box(self, mask: np.ndarray, point: tuple, horizontal: str, vertical: str) -> tuple:
+        ''' Where text anchored at `point` ends up, as (left, top, right, bottom) '''
+        height, width = mask.shape[:2]
+        x, y = point
+        if horizontal == 'center':
+            x -= width / 2
+        elif horizontal == 'right':
+            x -= width
+        if vertical == 'center':
+            y -= height / 2
+        elif vertical == 'bottom':
+            y -= height
+        return round(x), round(y), round(x) + width, round(y) + height
+
+    def _text(self, target: np.ndarray, font_name: str, text: str, point: tuple,
+              horizontal: str, vertical: str, alpha: float = 1, bbox: bool = False) -> None:
+        ''' Blends text onto `target`, optionally on a translucent black box like the matplotlib bbox. '''
+        if not text:
+            return
+        mask = self._text_mask(font_name, text)
+        left, top, right, bottom = self._text_box(mask, point, horizontal, vertical)
+        if bbox == True:
+            pad = round(points_to_pixels(FONT_SIZE) * 0.3)
+            region = target[max(top - pad, 0):max(bottom + pad, 0), max(left - pad, 0):max(right + pad, 0)]
+            region[:] = (region * 0.75).astype(np.uint8)
+        # clip to the frame
+        mask = mask[max(-top, 0):mask.shape[0] - max(bottom - target.shape[0], 0),
+                    max(-left, 0):mask.shape[1] - max(right - target.shape[1], 0)]
+        region = target[max(top, 0):min(bottom, target.shape[0]), max(left, 0):min(right, target.shape[1])]
+        coverage = mask * alpha
+        region[:] = (region * (1 - coverage) + self._foreground * coverage).astype(np.uint8)
+
+    def _draw_named_text(self, target: np.ndarray, name: str) -> None:
+        plot, fraction, horizontal, vertical, font_name, alpha, bbox = self.text_layout[name]
+        self._text(target, font_name, self.texts[name], self._axes_point(plot, fraction),
+                   horizontal, vertical, alpha, bbox)
+
+    def invalidate(self) -> None:
+        ''' Call this if any of the static text ('host', 'unraid_ver', 'plot_settings') changes. '''
+        self._static = None
+        self._underlay = None
+
+    def _draw_static(self) -> None:
+        ''' Background, tick marks on the time axes and static text; none of these change between frames. '''
+        static = self._background.copy()
+        tick_length = round(points_to_pixels(TICK_SIZE))
+        for plot in (0, 2, 3):
+            x, y, width, height = self.boxes[plot]
+            bottom = y + height
+            for tick in nice_ticks(0, self.x_span, 6):
+                # time axis is inverted: newest data on the right
+                tick_x = round(x + (1 - tick / self.x_span) * (width - 1)) if self.x_span > 0 else x + width - 1
+                static[bottom:bottom + tick_length, tick_x] = FOREGROUND
+        for name in ('host', 'unraid_ver', 'plot_settings'):
+            if name in self.texts:
+                self._draw_named_text(static, name)
+        self._static = static
+
+    def _bar_center(self, bar: int) -> float:
+        ''' Bars live at y = 1 and 2 with a height of 0.8, plus matplotlib's 5% margins. '''
+        x, y, width, height = self.boxes[4]
+        low, high = 0.6 - 0.09, 2.4 + 0.09
+        return y + (high - bar) / (high - low) * height
+
+    def _heatmap(self, core_percents) -> None:
+        x, y, width, height = self.boxes[1]
+        if len(core_percents) == 0:
+            return
+        colors = gist_heat(np.asarray(core_percents, dtype=np.float32) / 100).astype(np.float32)
+        edges = np.linspace(0, width, len(core_percents) + 1).round().astype(int)
+        # one cell per core, alpha 0.5 over the background
+        cells = np.repeat(colors, np.diff(edges), axis=0)
+        region = self.frame[y:y + height, x:x + width]
+        region[:] = (region * 0.5 + cells[None, :, :] * 0.5).astype(np.uint8)
+
+    def _bars(self, bar_values) -> None:
+        x, y, width, height = self.boxes[4]
+        low, high = 0.6 - 0.09, 2.4 + 0.09
+        for bar, value, color in zip((1, 2), bar_values, self.bar_colors):
+            top = round(y + (high - (bar + 0.4)) / (high - low) * height)
+            bottom = round(y + (high - (bar - 0.4)) / (high - low) * height)
+            right = x + round(min(max(value, 0), 100) / 100 * width)
+            self.frame[top:bottom, x:right] = color
+
+    def autoscale(self, plot: int, values: list) -> tuple:
+        ''' y-limits for plots without a 'ylim': 0 to the data maximum plus a 5% margin, like matplotlib. '''
+        if self.ylims[plot] is not None:
+            return tuple(self.ylims[plot])
+        peak = max((np.nanmax(line) for line in values if np.any(np.isfinite(line))), default=0)
+        if peak <= 0:
+            return (0, 1)
+        return (0, peak * 1.05)
+
+    def _line(self, region: np.ndarray, values: np.ndarray, ylim: tuple, style: tuple,
+              sample_columns: np.ndarray = None, first_column: int = 0, dash_offset: int = 0, drawn: np.ndarray = None,
+              dense: bool = None) -> None:
+        '''
+        Draws one line into `region` (a plot's box in the frame). For every pixel column we find the span
+        of rows the line passes through (linear interpolation between samples plus the min/max of all samples
+        landing in that column), then fill every span at once with a boolean mask.
+        Samples are spread evenly across the plot unless we're given the (fractional) column each one goes in.
+        Only columns from `first_column` on are drawn, and the pixels drawn are also set in `drawn` if given;
+        with no `region` that's all that happens (see _strip()).
+        `dense` says there are more samples than columns, for when we're only given some of them.
+        '''
+        height, width = (region if region is not None else drawn).shape[:2]
+        color, alpha, width_px, dash_mask = style
+        count = values.size
+        if count < 2 or width < 2:
+            return
+        start = max(first_column - 1, 0) # one more column to know where the line comes from
+        columns = np.arange(start, width)
+        if sample_columns is None:
+            sample_columns = np.arange(count) * ((width - 1) / (count - 1))
+            positions = columns * ((count - 1) / (width - 1))
+        else:
+            positions = np.interp(columns, sample_columns, np.arange(count)) # which sample (fractional) each column lands on
+        points = np.interp(positions, np.arange(count), values) # NaN next to missing samples
+        low = np.fmin(points, np.concatenate(([points[0]], points[:-1])))
+        high = np.fmax(points, np.concatenate(([points[0]], points[:-1])))
+        if dense is None:
+            dense = count > width
+        if dense == True:
+            # more samples than pixels; make sure spikes between columns still show up
+            sample_columns = np.clip(np.rint(sample_columns), 0, width - 1).astype(int)
+            starts = np.searchsorted(sample_columns, columns)
+            low = np.fmin(low, np.fmin.reduceat(values, starts))
+            high = np.fmax(high, np.fmax.reduceat(values, starts))
+        skip = first_column - start
+        columns, low, high = columns[skip:], low[skip:], high[skip:]
+        valid = np.isfinite(low) & np.isfinite(high)
+        if dash_mask is not None:
+            valid &= dash_mask[(columns + dash_offset) % dash_mask.size]
+        if not valid.any():
+            return
+        scale = (height - 1) / (ylim[1] - ylim[0])
+        half_width = (width_px - 1) / 2
+        top = np.rint((ylim[1] - np.where(valid, high, 0)) * scale - half_width)
+        bottom = np.rint((ylim[1] - np.where(valid, low, 0)) * scale + half_width)
+        rows = np.arange(height)[:, None]
+        mask = (rows >= top[None, :]) & (rows <= bottom[None, :]) & valid[None, :]
+        if region is not None:
+            blend(region[:, first_column:], mask, color, alpha)
+        if drawn is not None:
+            drawn[:, first_column:] |= mask
+
+    def _strip(self, plot: int, values: list, ylim: tuple, ages: np.ndarray, newest: float) -> None:
+        '''
+        Draws a plot's lines for strip_chart. Which pixels each line covers is kept in a strip the size of the plot,
+        placed on a pixel grid that's fixed in time, so a new sample moves everything over by a whole number of
+        columns: the strip is shifted by that much and only the columns from the last newest sample on are worked out.
+        The whole strip is only redone when the y-limits change (or time jumps back or past the whole plot).
+        Then the lines are blended onto the frame from their coverage, over the grid and ticks already there,
+        so the frame comes out the same as drawing the lines from scratch.
+        '''
+        x, y, width, height = self.boxes[plot]
+        pixels_per_second = (width - 1) / self.x_span
+        position = newest * pixels_per_second
+        origin = round(position)
+        ''' which column of the time grid is the plot's last one '''
+        newest_column = width - 1 + position - origin
+        strip = self._strips.get(plot)
+        if strip is None:
+            strip = {'coverage': np.empty((len(values), height, width), dtype=bool)}
+            ''' coverage[line] = the pixels that line is drawn on '''
+            self._strips[plot] = strip
+            shift = None
+        else:
+            shift = origin - strip['origin']
+        coverage = strip['coverage']
+        if shift is None or shift < 0 or shift >= width or ylim != strip['ylim']:
+            first_column = 0
+        else:
+            coverage[:, :, :width - shift] = coverage[:, :, shift:]
+            first_column = min(max(int(np.floor(strip['newest_column'] - shift)) - 1, 0), width - 1)
+        coverage[:, :, first_column:] = False
+        # only the samples landing in (or just before) the columns we draw
+        oldest_age = (newest_column - first_column + 2) / pixels_per_second
+        first_sample = max(ages.size - int(np.searchsorted(ages[::-1], oldest_age, side='right')) - 1, 0)
+        sample_columns = newest_column - ages[first_sample:] * pixels_per_second
+        for line, style, drawn in zip(values, self.line_styles[plot], coverage):
+            self._line(None, line[first_sample:], ylim, style, sample_columns, first_column, origin, drawn, ages.size > width)
+        strip.update(origin=origin, newest_column=newest_column, ylim=ylim)
+        region = self.frame[y:y + height, x:x + width]
+        for (color, alpha, _, _), drawn in zip(self.line_styles[plot], coverage):
+            blend(region, drawn, color, alpha)
+
+    def render(self, y_data: list, core_percents: list, bar_values: tuple, ages: np.ndarray = None,
+               newest: float = None) -> np.ndarray:
+        '''
+        Draws a full frame.
+        - y_data: y_data[plot][line] = sequence of samples, oldest first (NaN or None for missing)
+        - core_percents: per-core CPU usage for the heatmap
+        - bar_values: (array %, memory %)
+        - ages: when each sample was taken, as seconds before the newest one (same for every line).
+          None spreads the samples evenly across the plot.
+        - newest: when the newest sample was taken (seconds, any clock). Needed for strip_chart,
+          which also needs one entry in `ages` per sample; otherwise the lines are drawn from scratch.
+        '''
+        if self._static is None:
+            self._draw_static()
+        np.copyto(self.frame, self._static)
+        self._heatmap(core_percents)
+        self._bars(bar_values)
+        tick_labels = []
+        for plot in (0, 2, 3):
+            values = [np.asarray(line, dtype=np.float32) for line in y_data[plot]]
+            ylim = self.autoscale(plot, values)
+            x, y, width, height = self.boxes[plot]
+            scale = (height - 1) / (ylim[1] - ylim[0])
+            tick_length = round(points_to_pixels(TICK_SIZE))
+            for tick in nice_ticks(ylim[0], ylim[1]):
+                tick_y = round(y + (ylim[1] - tick) * scale)
+                self.frame[tick_y, x:x + tick_length] = FOREGROUND
+                tick_labels.append((tick_label(tick), (points_to_pixels(TICK_PAD), tick_y)))
+            if (self.strip_chart == True and newest is not None and ages is not None
+                    and all(line.size == ages.size for line in values)):
+                self._strip(plot, values, ylim, ages, newest)
+                continue
+            sample_columns = None if ages is None else (1 - ages / self.x_span) * (width - 1)
+            for line, style in zip(values, self.line_styles[plot]):
+                self._line(self.frame[y:y + height, x:x + width], line, ylim, style, sample_columns)
+        for bar, label in ((1, "Array"), (2, "Memory")):
+            tick_labels.append((label, (points_to_pixels(TICK_PAD), self._bar_center(bar))))
+        for text, point in tick_labels:
+            self._text(self.frame, 'tick', text, point, 'right', 'center')
+        for plot, config in enumerate(self.plot_config):
+            if 'title' in config:
+                self._text(self.frame, 'title', config['title'], self._axes_point(plot, (0.5, 0.5)),
+                           'center', 'center', 0.4)
+        if self._underlay is None:
+            self._underlay = np.empty_like(self.frame)
+        np.copyto(self._underlay, self.frame)
+        self._draw_overlay_text()
+        return self.frame
+
+    def _draw_overlay_text(self) -> None:
+        for name in self.texts:
+            if name not in ('host', 'unraid_ver', 'plot_settings'):
+                self._draw_named_text(self.frame, name)
+
+    def render_text(self) -> bool:
+        '''
+        Redraws just the text over the last frame from render(), for updating the readouts between frames.
+        Returns False if there's no frame to draw on yet.
+        '''
+        if self._underlay is None:
+            return False
+        np.copyto(self.frame, self._underlay)
+        self._draw_overlay_text()
+        return True
@@ -50,8 +50,25 @@ import sys
 import gc
 import threading
 import socket
-from collections import deque
+import mmap
+import hashlib
+import struct
+import pickle
+import shutil
+import stat
+import tempfile
+import multiprocessing
 import concurrent.futures as CF
+import asyncio
+
+startup_phases: list = []
+''' (phase, seconds) for each part of our setup, see startup_phase() '''
+def startup_phase(name: str) -> None:
+    ''' Marks the end of a setup phase. main() prints how long each one took. '''
+    now = time.time()
+    last = START_TIME + sum(seconds for _, seconds in startup_phases)
+    startup_phases.append((name, now - last))
+startup_phase("python")
 
 #==| Default Config |=====================================================
 #=========================================================================
@@ -108,6 +125,28 @@ PLOT_CONFIG: tuple = (
     }
 )
 BARPLOT_COLORS: list = ['#375e1f','#4a2a7a']
+RENDER_BACKEND: str = "matplotlib"
+BLITTING: bool = True
+PARTIAL_UPDATES: bool = True
+HISTORY_FILE: str = f"{CURRENT_DIR}/history.dat"
+DISPLAY: str = "ili9341"
+DISPLAY_OUTPUT: str = "default"
+METRICS_RECORD: str = None
+METRICS_REPLAY: str = None
+CACHE_DIR: str = f"{CURRENT_DIR}/cache"
+RENDER_PROCESS: bool = False
+LOOP_MODE: str = "threads"
+FORCE_REFRESH: int = 10
+SAMPLE_RATE: float = None
+SAMPLE_AGGREGATE: str = "max"
+TEXT_REFRESH_RATE: float = None
+STRIP_CHART: bool = False
+AUTOSCALE: str = "nice"
+
+MAX_PLOT_SIZE: float = 43200
+''' Longest plot we allow (minutes). Plots past RAW_HISTORY_LIMIT samples are drawn from a HistoryTier, see HistoryStore. '''
+MIN_SAMPLE_RATE: float = 0.1
+''' Shortest time between samples (seconds); below this CPU usage is mostly rounding from the kernel's 100Hz accounting '''
 
 #==| Program setup |==========================================================
 #=============================================================================
@@ -115,7 +154,11 @@ BARPLOT_COLORS: list = ['#375e1f','#4a2a7a']
 def sigterm_handler(signal, frame):
     ''' Cleanly exit when this Docker is shut down. '''
     mainpool.shutdown(wait=False, cancel_futures=True)
-    disp.image(bg_image, IMAGE_ROTATION) # leave a splash screen up when we exit
+    stop_render_process()
+    history.flush()
+    if cache_persistent == False:
+        shutil.rmtree(CACHE_DIR, ignore_errors=True)
+    disp.image(bg_image) # leave a splash screen up when we exit
     end_time = round(time.time() - START_TIME, 3)
     print(f"- Exit signal commanded at {datetime.datetime.now()}")
     print(f"  Script ran for {timedelta_clean(end_time)} and sampled {samples} times with {dropped_frames} dropped sample(s).")
@@ -131,14 +174,59 @@ def check_settings() -> None:
     Checks if the settings are correct and sets flags or reverts variables to safe fallbacks
     if they're incorrect or invalid.
     '''
-    global cpu_temp_available, network_interface_set, array_valid, REFRESH_RATE, CPU_TEMP_SENSOR, IMAGE_ROTATION, PLOT_SIZE
+    global cpu_temp_available, temp_sensors, network_interface_set, array_valid, REFRESH_RATE, CPU_TEMP_SENSOR, IMAGE_ROTATION, PLOT_SIZE, BLITTING, PARTIAL_UPDATES, RENDER_PROCESS, LOOP_MODE, FORCE_REFRESH, SAMPLE_RATE, SAMPLE_AGGREGATE, TEXT_REFRESH_RATE, STRIP_CHART, AUTOSCALE
     if REFRESH_RATE < 0.5:
         print_stderr("Warning: Refresh rate set too low. Refresh rate will be set to 0.5 seconds.")
         REFRESH_RATE = 0.5
 
+    if not isinstance(BLITTING, bool):
+        print_stderr(f"Warning: Blitting setting \'{BLITTING}\' is invalid. Value will be reset to \'true\'.")
+        BLITTING = True
+
+    if TEXT_REFRESH_RATE is None:
+        pass
+    elif not isinstance(TEXT_REFRESH_RATE, (int, float)) or isinstance(TEXT_REFRESH_RATE, bool) or TEXT_REFRESH_RATE <= 0:
+        print_stderr(f"Warning: Text refresh rate \'{TEXT_REFRESH_RATE}\' is invalid. Text will only be updated with each frame.")
+        TEXT_REFRESH_RATE = None
+    elif TEXT_REFRESH_RATE < MIN_SAMPLE_RATE:
+        print_stderr(f"Warning: Text refresh rate set too low. Text refresh rate will be set to {MIN_SAMPLE_RATE} seconds.")
+        TEXT_REFRESH_RATE = MIN_SAMPLE_RATE
+    elif TEXT_REFRESH_RATE >= REFRESH_RATE:
+        print_stderr("Notice: Text refresh rate isn't faster than the refresh rate. Text will only be updated with each frame.")
+        TEXT_REFRESH_RATE = None
+    if TEXT_REFRESH_RATE is not None and BLITTING == False and RENDER_BACKEND == "matplotlib":
+        print_stderr("Notice: Text refreshes need BLITTING with the matplotlib backend. Text will only be updated with each frame.")
+        TEXT_REFRESH_RATE = None
+
+    if SAMPLE_RATE is None and TEXT_REFRESH_RATE is not None:
+        # fresh readouts for every text refresh. The plots still get each frame's average, same as sampling once per frame
+        SAMPLE_RATE = TEXT_REFRESH_RATE
+        SAMPLE_AGGREGATE = "mean"
+    elif SAMPLE_RATE is None:
+        SAMPLE_RATE = REFRESH_RATE
+    elif not isinstance(SAMPLE_RATE, (int, float)) or isinstance(SAMPLE_RATE, bool):
+        print_stderr(f"Warning: Sample rate \'{SAMPLE_RATE}\' is invalid. Samples will be taken every frame.")
+        SAMPLE_RATE = REFRESH_RATE
+    elif SAMPLE_RATE < MIN_SAMPLE_RATE:
+        print_stderr(f"Warning: Sample rate set too low. Sample rate will be set to {MIN_SAMPLE_RATE} seconds.")
+        SAMPLE_RATE = MIN_SAMPLE_RATE
+    elif SAMPLE_RATE > REFRESH_RATE:
+        print_stderr("Warning: Sample rate can't be slower than the refresh rate. Samples will be taken every frame.")
+        SAMPLE_RATE = REFRESH_RATE
+    if SAMPLE_AGGREGATE not in ("max", "mean"):
+        print_stderr(f"Warning: Sample aggregate \'{SAMPLE_AGGREGATE}\' is invalid. Value will be reset to \'max\'.")
+        SAMPLE_AGGREGATE = "max"
+
+    if AUTOSCALE not in ("nice", "tight"):
+        print_stderr(f"Warning: Autoscale setting \'{AUTOSCALE}\' is invalid. Value will be reset to \'nice\'.")
+        AUTOSCALE = "nice"
+
     if PLOT_SIZE < 1:
         print_stderr(f"Warning: Desired plot duration ({PLOT_SIZE} min) is too short. Value will be reset to 1 minute.")
         PLOT_SIZE = 1
+    if PLOT_SIZE > MAX_PLOT_SIZE:
+        print_stderr(f"Warning: Desired plot duration ({PLOT_SIZE} min) is too long. Value will be reset to {MAX_PLOT_SIZE} minutes.")
+        PLOT_SIZE = MAX_PLOT_SIZE
 
     valid_rotations = [0, 90, 180, 270]
     if IMAGE_ROTATION in valid_rotations:
@@ -148,47 +236,61 @@ def check_settings() -> None:
         IMAGE_ROTATION = 0
     del valid_rotations
 
-    if not hasattr(psutil, "sensors_temperatures"):
+    if not isinstance(STRIP_CHART, bool):
+        print_stderr(f"Warning: Strip chart setting \'{STRIP_CHART}\' is invalid. Value will be reset to \'false\'.")
+        STRIP_CHART = False
+    if STRIP_CHART == True and RENDER_BACKEND != "numpy":
+        print_stderr("Notice: Strip chart drawing needs the numpy render backend. Lines will be drawn in full every frame.")
+        STRIP_CHART = False
+
+    if not isinstance(PARTIAL_UPDATES, bool):
+        print_stderr(f"Warning: Partial updates setting \'{PARTIAL_UPDATES}\' is invalid. Value will be reset to \'true\'.")
+        PARTIAL_UPDATES = True
+
+    if not isinstance(RENDER_PROCESS, bool):
+        print_stderr(f"Warning: Render process setting \'{RENDER_PROCESS}\' is invalid. Value will be reset to \'false\'.")
+        RENDER_PROCESS = False
+    if RENDER_PROCESS == True and "fork" not in multiprocessing.get_all_start_methods():
+        print_stderr("Warning: A separate render process isn't supported on this system. Rendering in this process instead.")
+        RENDER_PROCESS = False
+
+    if LOOP_MODE not in ("threads", "asyncio"):
+        print_stderr(f"Warning: Loop mode \'{LOOP_MODE}\' is invalid. Value will be reset to \'threads\'.")
+        LOOP_MODE = "threads"
+
+    if not isinstance(FORCE_REFRESH, int) or isinstance(FORCE_REFRESH, bool) or FORCE_REFRESH < 0:
+        print_stderr(f"Warning: Forced refresh setting \'{FORCE_REFRESH}\' is invalid. Value will be reset to \'10\'.")
+        FORCE_REFRESH = 10
+
+    # find our temperature sensors once, see temperature_sensors() in collector.py
+    if collector is not None:
+        temp_sensors = collector.temperature_sensors()
+    if not temp_sensors and hasattr(psutil, "sensors_temperatures"):
+        temp_sensors = dict.fromkeys(psutil.sensors_temperatures()) # no files to read, psutil will have to do
+    if not hasattr(psutil, "sensors_temperatures") and not temp_sensors:
         print_stderr("Notice: Temperature readouts not supported on this platform.")
         cpu_temp_available = False
-    else:
-        temps_test = psutil.sensors_temperatures()
-        if not temps_test:
-            print_stderr("Notice: No temperatures found on this system.")
+    elif not temp_sensors:
+        print_stderr("Notice: No temperatures found on this system.")
+        cpu_temp_available = False
+    # probe possible temperature names
+    if cpu_temp_available == True and CPU_TEMP_SENSOR not in temp_sensors:
+        print_stderr(f"Warning: CPU temperature \'{CPU_TEMP_SENSOR}\' not found.")
+        # Intel, AMD, then generic names
+        probe_sensor_names = ['coretemp', 'k10temp', 'k8temp', 'cpu_thermal', 'cpu_thermal_zone']
+        # take our first success
+        sensor_entry = next((name for name in probe_sensor_names if name in temp_sensors), None)
+        if sensor_entry is None:
+            print_stderr("         Continuing without temperature plot.")
+            print("Notice:  For your reference, the following temperature sensors were found:")
+            for name in temp_sensors:
+                print(f"{name}   ", end='')
+            print()
             cpu_temp_available = False
-        del temps_test
-    # probe possible temperature names    
-    if cpu_temp_available == True:
-        try:
-            test1 = psutil.sensors_temperatures()[CPU_TEMP_SENSOR][0].current
-            del test1
-        except:
-            print_stderr(f"Warning: CPU temperature \'{CPU_TEMP_SENSOR}\' not found.")
-            # Intel, AMD, then generic names
-            probe_sensor_names = iter(['coretemp', 'k10temp', 'k8temp', 'cpu_thermal', 'cpu_thermal_zone'])
-            # try until we hit our first success
-            while True:
-                sensor_entry = next(probe_sensor_names, "nothing")
-                if sensor_entry == "nothing":
-                    print_stderr("         Continuing without temperature plot.")
-                    sensor_list = psutil.sensors_temperatures()
-                    print("Notice:  For your reference, the following temperature sensors were found:")
-                    for name, entries in sensor_list.items():
-                        print(f"{name}   ", end='')
-                    print()
-                    del sensor_list
-                    cpu_temp_available = False
-                    break
-                try:
-                    test1 = psutil.sensors_temperatures()[sensor_entry][0].current
-                    # if successful, continue the rest of this block
-                    print_stderr(f"Notice: \'{CPU_TEMP_SENSOR}\' was not found but \'{sensor_entry}\' was.\n\
+        else:
+            print_stderr(f"Notice: \'{CPU_TEMP_SENSOR}\' was not found but \'{sensor_entry}\' was.\n\
         Please update the configuration to suppress this message in the future.")
-                    CPU_TEMP_SENSOR = sensor_entry
-                    del test1
-                    break
-                except:
-                    pass
+            CPU_TEMP_SENSOR = sensor_entry
 
     try:
         test2 = psutil.disk_usage(ARRAY_PATH)
@@ -236,7 +338,7 @@ def check_settings() -> None:
 
 def it_broke(type: int) -> None:
     ''' Our error handler. 1 = thread timeout, any other value is for any unknown error. '''
-    disp.image(bg_image, IMAGE_ROTATION)
+    disp.image(bg_image)
     mainpool.shutdown(wait=False, cancel_futures=True)
     if type == 1:
         end_time = round(time.time() - START_TIME, 3)
@@ -318,7 +420,12 @@ def refresh_rate_limiter(setup_time: float) -> None:
         print_stderr("ERROR: Setup took too long to finish. This system is unsuitable to run this program.")
         it_broke(1)
     if DEBUG == True:
-        plot_settings.set_text(f"Refresh: {REFRESH_RATE}s | Plot: {round(REFRESH_RATE * (HIST_SIZE - 1),1)}s")
+        if RENDER_BACKEND == "matplotlib":
+            plot_settings.set_text(f"Refresh: {REFRESH_RATE}s | Plot: {round(REFRESH_RATE * (HIST_SIZE - 1),1)}s")
+            invalidate_background()
+        else:
+            engine.texts['plot_settings'] = f"Refresh: {REFRESH_RATE}s | Plot: {round(REFRESH_RATE * (HIST_SIZE - 1),1)}s"
+            engine.invalidate()
 
 def thread_timer(begin_time: float, end_time: float, thread_id: int) -> None:
     ''' Collects how long it takes for the render threads to do their thing. '''
@@ -337,9 +444,16 @@ def thread_timer(begin_time: float, end_time: float, thread_id: int) -> None:
 # Initialize a sample counter
 samples: int = 0
 dropped_frames: int = 0
+# How many pixels we've sent to the display vs how many we've rendered
+pixels_sent: int = 0
+pixels_rendered: int = 0
+skipped_frames: int = 0
+''' Frames that weren't drawn or sent because nothing on them changed, see frame_changed() '''
 
 # Flags for checking user config (no type declarations here to work with older python)
 cpu_temp_available = True
+temp_sensors = {}
+''' Temperature sensor names found by check_settings(), and the file to read each one from (None = use psutil) '''
 network_interface_set = True
 array_valid = True
 
@@ -365,7 +479,9 @@ except:
     UNRAID_VERSION: str = "Unknown"
 
 # Load our settings file
-if str(CURRENT_DIR) == "/":
+if "STATUS_SCREEN_SETTINGS" in os.environ: # lets test/benchmark.py (or anyone else) point us at another settings file
+    SETTINGS_FILE = os.environ["STATUS_SCREEN_SETTINGS"]
+elif str(CURRENT_DIR) == "/":
     SETTINGS_FILE = f"{CURRENT_DIR}settings.yaml"
 else:
     SETTINGS_FILE = f"{CURRENT_DIR}/settings.yaml"
@@ -385,11 +501,50 @@ try:
         IMAGE_ROTATION: int = settings_loaded['IMAGE_ROTATION']
         BARPLOT_COLORS: list = settings_loaded['BARPLOT_COLORS']
         PLOT_CONFIG: tuple = settings_loaded['PLOT_CONFIG']
+        # newer settings are optional so older settings files still work
+        RENDER_BACKEND: str = settings_loaded.get('RENDER_BACKEND', RENDER_BACKEND)
+        BLITTING: bool = settings_loaded.get('BLITTING', BLITTING)
+        PARTIAL_UPDATES: bool = settings_loaded.get('PARTIAL_UPDATES', PARTIAL_UPDATES)
+        STRIP_CHART: bool = settings_loaded.get('STRIP_CHART', STRIP_CHART)
+        AUTOSCALE: str = settings_loaded.get('AUTOSCALE', AUTOSCALE)
+        history_file_tmp: str = settings_loaded.get('HISTORY_FILE', "default")
+        DISPLAY: str = settings_loaded.get('DISPLAY', DISPLAY)
+        DISPLAY_OUTPUT: str = settings_loaded.get('DISPLAY_OUTPUT', DISPLAY_OUTPUT)
+        metrics_record_tmp: str = settings_loaded.get('METRICS_RECORD', "none")
+        metrics_replay_tmp: str = settings_loaded.get('METRICS_REPLAY', "none")
+        cache_dir_tmp: str = settings_loaded.get('CACHE_DIR', "default")
+        RENDER_PROCESS: bool = settings_loaded.get('RENDER_PROCESS', RENDER_PROCESS)
+        LOOP_MODE: str = settings_loaded.get('LOOP_MODE', LOOP_MODE)
+        FORCE_REFRESH: int = settings_loaded.get('FORCE_REFRESH', FORCE_REFRESH)
+        sample_rate_tmp = settings_loaded.get('SAMPLE_RATE', "default")
+        SAMPLE_AGGREGATE: str = settings_loaded.get('SAMPLE_AGGREGATE', SAMPLE_AGGREGATE)
+        text_refresh_rate_tmp = settings_loaded.get('TEXT_REFRESH_RATE', "none")
         if splash_screen_tmp == "default":
             SPLASH_SCREEN = f"{CURRENT_DIR}/background.bmp"
         else:
             SPLASH_SCREEN = splash_screen_tmp
         del splash_screen_tmp
+        if history_file_tmp == "default":
+            HISTORY_FILE = f"{CURRENT_DIR}/history.dat"
+        elif history_file_tmp == "none":
+            HISTORY_FILE = None
+        else:
+            HISTORY_FILE = history_file_tmp
+        del history_file_tmp
+        METRICS_RECORD = None if metrics_record_tmp == "none" else metrics_record_tmp
+        METRICS_REPLAY = None if metrics_replay_tmp == "none" else metrics_replay_tmp
+        del metrics_record_tmp, metrics_replay_tmp
+        if cache_dir_tmp == "default":
+            CACHE_DIR = f"{CURRENT_DIR}/cache"
+        elif cache_dir_tmp == "none":
+            CACHE_DIR = None
+        else:
+            CACHE_DIR = cache_dir_tmp
+        del cache_dir_tmp
+        SAMPLE_RATE = None if sample_rate_tmp == "default" else sample_rate_tmp
+        del sample_rate_tmp
+        TEXT_REFRESH_RATE = None if text_refresh_rate_tmp == "none" else text_refresh_rate_tmp
+        del text_refresh_rate_tmp
         print("Successfully parsed settings file.")
     except:
         print_stderr("ERROR: Unable to parse settings file completely.\n\
@@ -413,6 +568,8 @@ if DEBUG == True:
     print(f"• We're running in: {CURRENT_DIR}")
     #print_stderr("• ℹ️ Testing a stderr message on this line.")
 
+startup_phase("settings")
+
 # Reduce traceback fluff and automatic garbage collections
 if DEBUG == False:
     sys.tracebacklimit = 0
@@ -420,61 +577,436 @@ else:
     sys.tracebacklimit = 1
 gc.set_threshold(10000, 50, 20)
 
+if DISPLAY not in ("ili9341", "none", "file", "framebuffer", "emulator"):
+    print_stderr(f"Warning: Display \'{DISPLAY}\' is invalid. Value will be reset to \'ili9341\'.")
+    DISPLAY = "ili9341"
+
+# Pick our render backend before loading dependencies; the numpy backend doesn't need matplotlib at all
+if RENDER_BACKEND not in ("matplotlib", "numpy"):
+    print_stderr(f"Warning: Render backend \'{RENDER_BACKEND}\' is invalid. Value will be reset to \'matplotlib\'.")
+    RENDER_BACKEND = "matplotlib"
+if RENDER_BACKEND == "numpy":
+    try:
+        import fastrender
+    except ImportError:
+        print_stderr(f"Warning: Unable to load \'fastrender.py\' for the numpy render backend. Using matplotlib instead.")
+        RENDER_BACKEND = "matplotlib"
+
+# Somewhere to keep things that make startup faster (matplotlib's font cache, our figure template).
+# Keep it in the app's directory so it survives the container being recreated. If we can't write there, use a new
+# private directory in /tmp for this run only: anyone can create directories in /tmp, so one with a name we'd reuse
+# could have been set up by someone else, and we unpickle what's in it.
+cache_persistent: bool = True
+''' False when CACHE_DIR is a throwaway directory, then there's no point saving a figure template '''
+if CACHE_DIR is not None:
+    try:
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        if not os.access(CACHE_DIR, os.W_OK):
+            raise PermissionError
+    except OSError:
+        print_stderr(f"Notice: Unable to write to cache directory '{CACHE_DIR}'. Startup caches will not be kept.")
+        CACHE_DIR = tempfile.mkdtemp(prefix="unraid-status-screen-")
+        cache_persistent = False
+    if RENDER_BACKEND == "matplotlib" and "MPLCONFIGDIR" not in os.environ:
+        # otherwise matplotlib rebuilds its font list in a fresh container's home directory on every start
+        os.environ["MPLCONFIGDIR"] = f"{CACHE_DIR}/matplotlib"
+
 # Load in external dependencies after printing where we're running python
 try:
     # Python Imaging Library
     from PIL import Image
-    # Matplotlib
-    import matplotlib
-    import matplotlib.pyplot as plt
-    import matplotx
+    # Matplotlib; no pyplot, we only ever draw into one Agg canvas. matplotx is loaded when it's needed (see build_figure())
+    if RENDER_BACKEND == "matplotlib":
+        import matplotlib
+        import matplotlib.style
+        from matplotlib.figure import Figure
+        from matplotlib.backends.backend_agg import FigureCanvasAgg
     import numpy as np
     # System Stats
     import psutil
 except:
     raise ImportError("Required modules failed to load. Check your Python environment.")
+# Optional: read our counters straight from /proc on Linux instead of through psutil
+try:
+    import collector
+except ImportError:
+    collector = None
+startup_phase("imports")
+
+# Metrics logs (METRICS_RECORD / METRICS_REPLAY)
+METRICS_MAGIC: bytes = b'USSMLOG1'
+METRICS_HEADER_FORMAT: str = '<8sId'
+''' magic, core count, REFRESH_RATE; padded out to METRICS_HEADER_SIZE '''
+METRICS_HEADER_SIZE: int = 32
+
+def metrics_dtype(cores: int) -> np.dtype:
+    '''
+    One sample in a metrics log: everything update_plot() and the renderers get from update_data().
+    Rates are in bytes/s, a missing CPU temperature is NaN. About 90 bytes + 4 per core.
+    '''
+    return np.dtype([
+        ('time', '<f8'), # wall clock
+        ('cpu', '<f4'),
+        ('cpu_freq', '<f4'), # GHz
+        ('cpu_temp', '<f4'),
+        ('disk', '<f4', 2), # read, write
+        ('net', '<f4', 2), # received, sent
+        ('nic_isup', 'u1'),
+        ('array', '<u8', 2), # used, total
+        ('array_percent', '<f4'),
+        ('memory', '<u8', 2), # used, total
+        ('memory_percent', '<f4'),
+        ('cores', '<f4', (cores,)),
+    ])
+
+def metrics_header(cores: int, refresh_rate: float) -> bytes:
+    return struct.pack(METRICS_HEADER_FORMAT, METRICS_MAGIC, cores, refresh_rate).ljust(METRICS_HEADER_SIZE, b'\0')
+
+class MetricsRecorder:
+    '''
+    Appends every sample update_data() takes to a compact binary log (see metrics_dtype()) so it can be
+    played back later with METRICS_REPLAY. A log from the same machine and REFRESH_RATE is added to,
+    anything else is started over.
+    '''
+
+    def __init__(self, path: str, cores: int, refresh_rate: float):
+        self.dtype = metrics_dtype(cores)
+        header = metrics_header(cores, refresh_rate)
+        self.record = np.zeros((), dtype=self.dtype)
+        try:
+            with open(path, 'rb') as file:
+                existing = file.read(METRICS_HEADER_SIZE)
+            size = os.path.getsize(path)
+        except OSError:
+            existing = b''
+        if existing == header:
+            # drop a half written sample if we were cut off last time
+            os.truncate(path, METRICS_HEADER_SIZE + (size - METRICS_HEADER_SIZE) // self.dtype.itemsize * self.dtype.itemsize)
+            self.file = open(path, 'ab')
+        else:
+            if existing:
+                print_stderr(f"Notice: Metrics log \'{path}\' was recorded with different settings and will be started over.")
+            self.file = open(path, 'wb')
+            self.file.write(header)
+
+    def write(self, tick: dict) -> None:
+        record = self.record
+        record['time'] = tick['time']
+        record['cpu'] = tick['cpu']
+        record['cpu_freq'] = tick['cpu_freq']
+        record['cpu_temp'] = np.nan if tick['cpu_temp'] is None else tick['cpu_temp']
+        record['disk'] = tick['disk']
+        record['net'] = tick['net']
+        record['nic_isup'] = tick['nic_isup']
+        record['array'] = tick['array'][:2]
+        record['array_percent'] = tick['array'][2]
+        record['memory'] = tick['memory'][:2]
+        record['memory_percent'] = tick['memory'][2]
+        record['cores'][:len(tick['cores'])] = tick['cores']
+        self.file.write(record.tobytes())
+        self.file.flush()
+
+    def close(self) -> None:
+        self.file.close()
+
+class MetricsReplay:
+    '''
+    Plays back a log written by MetricsRecorder, one sample per update_data() call.
+    `cores` and `refresh_rate` are what the log was recorded with.
+    '''
+
+    def __init__(self, path: str):
+        with open(path, 'rb') as file:
+            header = file.read(METRICS_HEADER_SIZE)
+            data = file.read()
+        if len(header) < METRICS_HEADER_SIZE or header[:8] != METRICS_MAGIC:
+            raise ValueError(f"\'{path}\' is not a metrics log.")
+        _, self.cores, self.refresh_rate = struct.unpack_from(METRICS_HEADER_FORMAT, header)
+        dtype = metrics_dtype(self.cores)
+        self.ticks = np.frombuffer(data, dtype=dtype, count=len(data) // dtype.itemsize)
+        self.position = 0
+        self.finished = False
+        ''' True once next() has been called past the end of the log '''
+
+    def __len__(self) -> int:
+        return self.ticks.size
+
+    def next(self) -> dict:
+        ''' The next sample in the same form sample_metrics() returns, or None at the end of the log. '''
+        if self.position >= self.ticks.size:
+            self.finished = True
+            return None
+        record = self.ticks[self.position]
+        self.position += 1
+        # float32 doesn't give back 18.2 exactly, round everything like sample_metrics() does
+        return {
+            'time': float(record['time']),
+            'cpu': round(float(record['cpu']), 1),
+            'cpu_freq': round(float(record['cpu_freq']), 2),
+            'cpu_temp': None if np.isnan(record['cpu_temp']) else float(record['cpu_temp']),
+            'disk': record['disk'].tolist(),
+            'net': record['net'].tolist(),
+            'nic_isup': bool(record['nic_isup']),
+            'array': (int(record['array'][0]), int(record['array'][1]), round(float(record['array_percent']), 1)),
+            'memory': (int(record['memory'][0]), int(record['memory'][1]), round(float(record['memory_percent']), 1)),
+            'cores': [round(core, 1) for core in record['cores'].tolist()],
+        }
+
+    def rewind(self) -> None:
+        self.position = 0
+        self.finished = False
 
 # Get us our core count
 CORE_COUNT = os.cpu_count()
 if CORE_COUNT == None:
     raise RuntimeError("Cannot determine CPU core count. Program cannot continue.")
 
+# Replaying a metrics log? Then look like the machine it was recorded on
+metrics_replay = None
+if METRICS_REPLAY is not None:
+    metrics_replay = MetricsReplay(METRICS_REPLAY)
+    CORE_COUNT = metrics_replay.cores
+    REFRESH_RATE = metrics_replay.refresh_rate
+    HISTORY_FILE = None # don't mix replayed samples into our real history
+    if METRICS_RECORD is not None:
+        print_stderr("Notice: METRICS_RECORD is ignored while replaying a metrics log.")
+        METRICS_RECORD = None
+    print(f"Replaying {len(metrics_replay)} samples from \'{METRICS_REPLAY}\' \
+({metrics_replay.cores} cores, {metrics_replay.refresh_rate}s refresh rate).")
+
 # Important; changes some variables if necessary before their first use
 check_settings()
+startup_phase("settings check")
 
-# Check environment just in case we're not started by init.sh
-if "BLINKA_FT232H" in os.environ:
-    if os.environ["BLINKA_FT232H"] != "1":
-        os.environ["BLINKA_FT232H"] = "1"
-else:
-    os.environ["BLINKA_FT232H"] = "1"
+# Setup display
+'''
+Every display sink has the same few things main.py uses:
+- width, height: the size we draw at, after rotation
+- image(image): shows a PIL image (the splash screen)
+- block(x0, y0, x1, y1, data): writes big-endian RGB565 pixels into a rectangle (inclusive coordinates)
+- show(): called once a whole frame has been written
+'''
+MADCTL_ROTATIONS: dict = {0: 0x48, 90: 0xE8, 180: 0x88, 270: 0x28}
+''' ILI9341 memory access control (0x36) values for each IMAGE_ROTATION. 0x48 is the driver's default. '''
+SPI_BAUDRATE: int = 24000000
+''' SPI clock for the ILI9341 (Hz) '''
+
+def image_to_rgb565(image) -> np.ndarray:
+    ''' Converts a PIL image into a big-endian RGB565 array. Only for the odd image, frames use frame_to_rgb565(). '''
+    rgb = np.asarray(image.convert('RGB')).astype(np.uint16)
+    return (((rgb[..., 0] & 0xF8) << 8) | ((rgb[..., 1] & 0xFC) << 3) | (rgb[..., 2] >> 3)).astype('>u2')
+
+def rgb565_to_rgb(frame: np.ndarray) -> np.ndarray:
+    ''' Expands an RGB565 array back into 8-bit RGB '''
+    frame = frame.astype(np.uint16)
+    rgb = np.empty(frame.shape + (3,), dtype=np.uint8)
+    rgb[..., 0] = ((frame >> 11) & 0x1F) * 255 // 31
+    rgb[..., 1] = ((frame >> 5) & 0x3F) * 255 // 63
+    rgb[..., 2] = (frame & 0x1F) * 255 // 31
+    return rgb
+
+def replace_file(path: str, write, mode: int = 0o644) -> None:
+    '''
+    Calls write(file) on a new file next to `path`, then puts it in place of `path` in one go so it's never read half written.
+    The file gets a name of its own, so two of us writing the same path can't trip over each other.
+    '''
+    with tempfile.NamedTemporaryFile(dir=os.path.dirname(path) or ".", prefix=f".{os.path.basename(path)}.", delete=False) as file:
+        try:
+            write(file)
+            os.fchmod(file.fileno(), mode)
+        except BaseException:
+            file.close()
+            os.unlink(file.name)
+            raise
+    os.replace(file.name, path)
+
+class ILI9341Sink:
+    '''
+    The original: an ILI9341 hooked up through an Adafruit FT232H.
+    The display controller handles rotation (see MADCTL_ROTATIONS) so frames never have to be rotated before they're sent.
+    `display` swaps the hardware for something with the same interface as the adafruit driver (see EmulatorSink).
+    '''
 
-# Load in Blinka CircuitPython
-try:
-    import board
-    import digitalio
-    import adafruit_rgb_display.ili9341 as ili9341
-    from pyftdi.ftdi import Ftdi
-except:
-    raise ImportError("Cannot load in required interfaces. Possible causes:\n\
+    def __init__(self, display=None):
+        if display is None:
+            display = self._connect()
+        self.display = display
+        self.display.write(0x36, bytes([MADCTL_ROTATIONS[IMAGE_ROTATION]]))
+        if IMAGE_ROTATION == 90 or IMAGE_ROTATION == 270:
+            self.display.width, self.display.height = self.display.height, self.display.width
+        self.width = self.display.width
+        self.height = self.display.height
+
+    def _connect(self):
+        ''' Sets up the FT232H and returns the ILI9341 driver '''
+        # Check environment just in case we're not started by init.sh
+        if "BLINKA_FT232H" in os.environ:
+            if os.environ["BLINKA_FT232H"] != "1":
+                os.environ["BLINKA_FT232H"] = "1"
+        else:
+            os.environ["BLINKA_FT232H"] = "1"
+
+        # Load in Blinka CircuitPython
+        try:
+            import board
+            import digitalio
+            import adafruit_rgb_display.ili9341 as ili9341
+            from pyftdi.ftdi import Ftdi
+        except:
+            raise ImportError("Cannot load in required interfaces. Possible causes:\n\
              - FT232H board not detected or attached.\n\
              - Insufficient permission to access USB devices. Try running with elevated permissions.\n\
              - The dependencies may not have been set up correctly.")
 
-# print("- Checking status of display:")
-try:
-    #Ftdi().open_from_url('ftdi:///?') # this will force a SystemExit, don't use
-    Ftdi.show_devices()
-except:
-    it_broke(2)
+        # print("- Checking status of display:")
+        try:
+            #Ftdi().open_from_url('ftdi:///?') # this will force a SystemExit, don't use
+            Ftdi.show_devices()
+        except:
+            it_broke(2)
 
-# Setup display
-cs_pin = digitalio.DigitalInOut(board.C0)
-dc_pin = digitalio.DigitalInOut(board.C1)
-rst_pin = digitalio.DigitalInOut(board.C2)
-disp = ili9341.ILI9341(board.SPI(), cs=cs_pin, dc=dc_pin, rst=rst_pin, baudrate=24000000)
+        cs_pin = digitalio.DigitalInOut(board.C0)
+        dc_pin = digitalio.DigitalInOut(board.C1)
+        rst_pin = digitalio.DigitalInOut(board.C2)
+        return ili9341.ILI9341(board.SPI(), cs=cs_pin, dc=dc_pin, rst=rst_pin, baudrate=SPI_BAUDRATE)
+
+    def image(self, image) -> None:
+        self.display.image(image)
+
+    def block(self, x0: int, y0: int, x1: int, y1: int, data) -> None:
+        self.display._block(x0, y0, x1, y1, data)
+
+    def show(self) -> None:
+        pass
+
+class EmulatorSink(ILI9341Sink):
+    '''
+    The ILI9341 path with emulator.ILI9341Emulator where the hardware would be: same commands, same bytes,
+    but counted instead of sent. If `path` is given the panel is saved there as a PNG after every frame,
+    exactly as the screen would show it (rotation included).
+    '''
+
+    def __init__(self, path: str = None):
+        try:
+            import emulator
+        except ImportError:
+            raise ImportError("DISPLAY is set to \'emulator\' but emulator.py could not be loaded.")
+        super().__init__(emulator.ILI9341Emulator(baudrate=SPI_BAUDRATE))
+        self.path = path
+        self.frames = 0
+
+    def image(self, image) -> None:
+        super().image(image)
+        self.display.reset_counters() # only the splash screen comes through here, it's not a frame
+
+    def show(self) -> None:
+        self.frames += 1
+        if self.path is not None:
+            replace_file(self.path, lambda file: Image.fromarray(self.display.panel_rgb()).save(file, format='PNG', compress_level=1))
+
+    def stats(self) -> str:
+        ''' What the frames so far would have cost on the SPI bus, per frame '''
+        frames = max(self.frames, 1)
+        return f"{bytes2human(self.display.bytes / frames)}, \
+{round(self.display.transactions / frames, 1)} transactions, \
+{round(self.display.simulated_time / frames * 1000, 2)}ms per frame at {SPI_BAUDRATE / 1e6}MHz ({self.frames} frames)"
+
+class NullSink:
+    ''' Throws every frame away. Good for measuring how long rendering takes by itself. '''
+
+    def __init__(self, width: int = 240, height: int = 320):
+        if IMAGE_ROTATION == 90 or IMAGE_ROTATION == 270:
+            width, height = height, width
+        self.width = width
+        self.height = height
+
+    def image(self, image) -> None:
+        pass
+
+    def block(self, x0: int, y0: int, x1: int, y1: int, data) -> None:
+        pass
+
+    def show(self) -> None:
+        pass
+
+class FileSink(NullSink):
+    '''
+    Keeps a copy of the screen and writes it to `path` after every frame: a PNG if the path ends in .png,
+    raw big-endian RGB565 otherwise. The file is replaced in one go so it's never read half written.
+    '''
+
+    def __init__(self, path: str, width: int = 240, height: int = 320):
+        super().__init__(width, height)
+        self.path = path
+        self.frame = np.zeros((self.height, self.width), dtype='>u2')
+
+    def image(self, image) -> None:
+        pixels = image_to_rgb565(image)
+        self.frame[:pixels.shape[0], :pixels.shape[1]] = pixels[:self.height, :self.width]
+        self.show()
+
+    def block(self, x0: int, y0: int, x1: int, y1: int, data) -> None:
+        self.frame[y0:y1 + 1, x0:x1 + 1] = np.frombuffer(data, dtype='>u2').reshape(y1 - y0 + 1, x1 - x0 + 1)
+
+    def show(self) -> None:
+        if self.path.lower().endswith('.png'):
+            replace_file(self.path, lambda file: Image.fromarray(rgb565_to_rgb(self.frame)).save(file, format='PNG', compress_level=1))
+        else:
+            replace_file(self.path, lambda file: file.write(self.frame.tobytes()))
+
+class FramebufferSink(NullSink):
+    '''
+    Draws into a Linux framebuffer (/dev/fb*) through a memory map, for screens attached directly to the machine.
+    We draw in the top left corner at our usual size. 16 and 32 bits per pixel are supported.
+    Rotating the framebuffer itself is up to the system (e.g. fbcon=rotate), IMAGE_ROTATION 90/270 just lays the plots out in landscape.
+    '''
+
+    def __init__(self, device: str, width: int = 240, height: int = 320):
+        super().__init__(width, height)
+        sysfs = f"/sys/class/graphics/{os.path.basename(device)}"
+        with open(f"{sysfs}/bits_per_pixel") as file:
+            self.bits = int(file.read())
+        with open(f"{sysfs}/stride") as file:
+            stride = int(file.read())
+        with open(f"{sysfs}/virtual_size") as file:
+            fb_width, fb_height = (int(size) for size in file.read().split(','))
+        if fb_width < self.width or fb_height < self.height:
+            raise ValueError(f"Framebuffer {device} ({fb_width}x{fb_height}) is smaller than {self.width}x{self.height}.")
+        if self.bits == 16:
+            dtype = np.dtype('<u2')
+        elif self.bits == 32:
+            dtype = np.dtype('<u4')
+        else:
+            raise ValueError(f"Framebuffer {device} uses {self.bits} bits per pixel, only 16 and 32 are supported.")
+        self.file = open(device, 'r+b')
+        self.map = mmap.mmap(self.file.fileno(), stride * fb_height)
+        pixels = np.ndarray((fb_height, stride // dtype.itemsize), dtype=dtype, buffer=self.map)
+        self.pixels = pixels[:self.height, :self.width]
+
+    def image(self, image) -> None:
+        pixels = image_to_rgb565(image)[:self.height, :self.width]
+        self.block(0, 0, pixels.shape[1] - 1, pixels.shape[0] - 1, pixels.tobytes())
+
+    def block(self, x0: int, y0: int, x1: int, y1: int, data) -> None:
+        pixels = np.frombuffer(data, dtype='>u2').reshape(y1 - y0 + 1, x1 - x0 + 1)
+        if self.bits == 16:
+            self.pixels[y0:y1 + 1, x0:x1 + 1] = pixels # numpy does the byte swap
+        else:
+            rgb = rgb565_to_rgb(pixels).astype(np.uint32)
+            self.pixels[y0:y1 + 1, x0:x1 + 1] = (rgb[..., 0] << 16) | (rgb[..., 1] << 8) | rgb[..., 2]
+
+if DISPLAY == "none":
+    disp = NullSink()
+elif DISPLAY == "file":
+    disp = FileSink(DISPLAY_OUTPUT if DISPLAY_OUTPUT != "default" else f"{CURRENT_DIR}/screen.png")
+elif DISPLAY == "framebuffer":
+    disp = FramebufferSink(DISPLAY_OUTPUT if DISPLAY_OUTPUT != "default" else "/dev/fb0")
+elif DISPLAY == "emulator":
+    disp = EmulatorSink(DISPLAY_OUTPUT if DISPLAY_OUTPUT != "default" else None)
+else:
+    disp = ILI9341Sink()
 if DEBUG == True:
-    print(f"• Display size: {disp.width}x{disp.height}")
+    print(f"• Display: {DISPLAY}, size: {disp.width}x{disp.height}")
 
 # Have a splash screen while loading
 if SPLASH_SCREEN == "none":
@@ -485,32 +1017,40 @@ else:
     except:
         bg_image = Image.new('RGB', (disp.width, disp.height))    
         print_stderr(f"Notice: Unable to load splash screen \'{SPLASH_SCREEN}\'. Check your configuration.")
-disp.image(bg_image, IMAGE_ROTATION)
+if bg_image.size == (disp.height, disp.width): # a portrait splash screen on a landscape display or vice versa
+    bg_image = bg_image.rotate(90, expand=True)
+disp.image(bg_image)
+startup_phase("display")
 
 # Convert desired plot duration to plot size
 HIST_SIZE = int((PLOT_SIZE * 60) // REFRESH_RATE) + 1
-''' Our plot length '''
-if HIST_SIZE > 501:
-    HIST_SIZE = 501
-    print_stderr(f"Warning: Desired plot history ({PLOT_SIZE}min) cannot fit into plot. Data will be truncated.")
+''' Our plot length (in samples). Long plots are drawn from coarser history, see HistoryStore. '''
 
 # our baseline thread timeout until/if the profiler takes over
 timeout_wait = [REFRESH_RATE * 1.25, REFRESH_RATE * 1.25]
-matplotlib.use('Agg', force=True)
+if RENDER_BACKEND == "matplotlib":
+    matplotlib.use('Agg', force=True)
 
 if DEBUG == True:
-    print(f"• Using: matplotlib {matplotlib.__version__}, {matplotlib.get_backend()} backend\n\
+    if RENDER_BACKEND == "matplotlib":
+        print(f"• Using: matplotlib {matplotlib.__version__}, {matplotlib.get_backend()} backend\n\
+         psutil {psutil.version_info} | numpy {np.__version__} | PIL {Image.__version__}")
+    else:
+        print(f"• Using: numpy render backend\n\
          psutil {psutil.version_info} | numpy {np.__version__} | PIL {Image.__version__}")
     
 # Start our thread pool
-mainpool = CF.ThreadPoolExecutor(max_workers=7)
+mainpool = CF.ThreadPoolExecutor(max_workers=5)
 '''
 We expect to only run the following:
-- update_data() ← one thread
-    - 4 workers
+- update_data() ← our data sampler
 - update_plot() ← our plot generator
 - plot_renderer() ← our display renderer
-- Σ = 7
+- update_plot() and plot_renderer() again, for the frame after one that timed out while they're still going
+- Σ = 5
+There's only ever one update_data() running: the sampler's state isn't shared between threads, so main() waits
+for the one it has instead of starting another.
+With LOOP_MODE: asyncio it runs at most a sample and a frame at a time, see main_async().
 '''
 
 # Get info of our current process
@@ -522,6 +1062,34 @@ if DEBUG == True:
     except:
         print(f"• Running with {this_process.num_threads()} threads")
 
+# Open the files our counters come from, anything it can't read will come from psutil
+proc_reader = None
+if collector is not None and sys.platform.startswith('linux'):
+    if network_interface_set == True:
+        proc_reader = collector.ProcReader(NETWORK_INTERFACE)
+    else:
+        proc_reader = collector.ProcReader()
+    if DEBUG == True:
+        print(f"• Reading counters directly from: {', '.join(proc_reader.files) or 'nothing (using psutil)'}")
+
+# Keep the CPU temperature file open so each sample is a single read
+cpu_temp_file = None
+if cpu_temp_available == True and temp_sensors.get(CPU_TEMP_SENSOR) is not None:
+    try:
+        cpu_temp_file = collector.ProcFile(temp_sensors[CPU_TEMP_SENSOR], 64)
+    except OSError:
+        pass
+    if DEBUG == True and cpu_temp_file is not None:
+        print(f"• Reading CPU temperature from: {temp_sensors[CPU_TEMP_SENSOR]}")
+
+metrics_recorder = None
+if METRICS_RECORD is not None:
+    try:
+        metrics_recorder = MetricsRecorder(METRICS_RECORD, CORE_COUNT, REFRESH_RATE)
+        print(f"Recording metrics to \'{METRICS_RECORD}\'")
+    except OSError:
+        print_stderr(f"Warning: Unable to open metrics log \'{METRICS_RECORD}\'. Metrics will not be recorded.")
+
 PROFILING: bool = True
 ''' Enable or disable the thread timeout profiler, HIGHLY recommended to be left as True '''
 PROFILER_COUNT: int = 0
@@ -567,7 +1135,7 @@ It took anywhere between 4-6 seconds to do a single render.
 On the opposite end was an overclocked Threadripper 7970X at 5.5GHz and it took approximately ~95ms to complete.
  '''
 
-# Setup arrays we can put latest sensor info into rather than parsing our y_data list every time
+# Setup arrays we can put latest sensor info into rather than parsing our history every time
 current_data: list = []
 for plot in PLOT_CONFIG: # this will make n+1 indices
     for _ in plot['line_config']:
@@ -575,277 +1143,1245 @@ for plot in PLOT_CONFIG: # this will make n+1 indices
 current_data[-1] = "" # utilize that last index
 cpu_percs_cores: list = [] # setup array for CPU core utilization
 
-# Setup X data storage
-x_time: list = [x * REFRESH_RATE for x in range(HIST_SIZE)]
-x_time.reverse()
-
 # Setup Y data storage
-y_data = [ [deque([None] * HIST_SIZE, maxlen=HIST_SIZE) for _ in plot['line_config']]
-           for plot in PLOT_CONFIG
-         ]
+RAW_HISTORY_LIMIT: int = 1201
+''' Most samples we keep at full resolution (per line). Longer plots are drawn from a coarser HistoryTier of about as many buckets. '''
+HISTORY_MAGIC: bytes = b'USSHIST1'
+HISTORY_HEADER_SIZE: int = 64
+''' History files start with HISTORY_MAGIC and a hash of their layout, then the arrays follow, 64 byte aligned '''
 
-#==| matplotlib setup |=======================================================
+def allocate_history(layout: list, path: str = None, tag: str = "") -> tuple:
+    '''
+    Creates the arrays described by `layout` ([(name, shape, dtype), ...]) for a HistoryStore.
+    With a `path` they live in a memory-mapped file, so writing a sample is just a store into the page cache
+    and the history survives restarts. Anything else (or if the file can't be used) keeps them in memory.
+    Either way the memory is shared with any process we fork, see start_render_process().
+    Returns (arrays, reattached) where reattached is True if the file already held history with this exact layout and `tag`.
+    '''
+    arrays = {}
+    offsets = []
+    total = HISTORY_HEADER_SIZE
+    for name, shape, dtype in layout:
+        offsets.append(total)
+        total += -(-int(np.prod(shape)) * np.dtype(dtype).itemsize // 64) * 64
+    if path is None:
+        # anonymous shared memory rather than plain arrays, so a render process (RENDER_PROCESS) sees every sample we add
+        data = np.frombuffer(mmap.mmap(-1, total), dtype=np.uint8)
+        for (name, shape, dtype), offset in zip(layout, offsets):
+            arrays[name] = np.ndarray(shape, dtype=dtype, buffer=data, offset=offset)
+        return arrays, False
+    signature = hashlib.sha1(f"{[(name, shape, np.dtype(dtype).str) for name, shape, dtype in layout]} {tag}".encode()).digest()
+    reattached = False
+    try:
+        if os.path.isfile(path) and os.path.getsize(path) == total:
+            with open(path, 'rb') as file:
+                header = file.read(HISTORY_HEADER_SIZE)
+            reattached = header[:len(HISTORY_MAGIC)] == HISTORY_MAGIC and header[len(HISTORY_MAGIC):].startswith(signature)
+        data = np.memmap(path, dtype=np.uint8, mode='r+' if reattached else 'w+', shape=(total,))
+    except (OSError, ValueError):
+        print_stderr(f"Warning: Unable to use history file \'{path}\'. History will not be kept between restarts.")
+        return allocate_history(layout)
+    for (name, shape, dtype), offset in zip(layout, offsets):
+        arrays[name] = np.ndarray(shape, dtype=dtype, buffer=data, offset=offset)
+    if reattached == False:
+        # stamp the header; the caller fills in the arrays
+        data[:HISTORY_HEADER_SIZE] = 0
+        data[:len(HISTORY_MAGIC)] = np.frombuffer(HISTORY_MAGIC, dtype=np.uint8)
+        data[len(HISTORY_MAGIC):len(HISTORY_MAGIC) + len(signature)] = np.frombuffer(signature, dtype=np.uint8)
+    arrays['file'] = data
+    return arrays, reattached
+
+def clear_ring(ring: np.ndarray, start: int, count: int) -> None:
+    ''' Sets `count` entries of a double-length ring to NaN in both halves, starting at `start` and wrapping around. '''
+    capacity = ring.shape[-1] // 2
+    slots = (start + np.arange(min(count, capacity))) % capacity
+    ring[..., slots] = np.nan
+    ring[..., slots + capacity] = np.nan
+
+class RunningMax:
+    '''
+    The max of every line over any run of slots in a ring, kept up to date as slots are written instead of
+    scanning the whole plot every frame. A segment tree over the ring's slots, one node per row with every line
+    in it: writing a slot updates the log2(capacity) nodes above it and a run of slots takes about as many to look up.
+    Missing (NaN) values are left out. Lives in shared memory like the history, so a render process sees every update.
+    '''
+
+    def __init__(self, lines: int, capacity: int):
+        self.capacity = capacity
+        self.leaves = 1 << max(capacity - 1, 1).bit_length()
+        ''' the bottom row of the tree, capacity rounded up to a power of 2 '''
+        arrays, _ = allocate_history([('tree', (self.leaves * 2, lines), np.float32)])
+        self.tree = arrays['tree']
+        self.tree.fill(np.nan)
+
+    def set(self, slot: int, values: np.ndarray) -> None:
+        node = slot + self.leaves
+        self.tree[node] = values
+        node //= 2
+        while node >= 1:
+            np.fmax(self.tree[node * 2], self.tree[node * 2 + 1], out=self.tree[node])
+            node //= 2
+
+    def rebuild(self, values: np.ndarray) -> None:
+        ''' Starts over from `values` ([line, slot], one ring's worth), for when lots of slots changed at once '''
+        self.tree[self.leaves:] = np.nan
+        self.tree[self.leaves:self.leaves + self.capacity] = values.T
+        level = self.leaves // 2
+        while level >= 1:
+            np.fmax(self.tree[level * 2:level * 4:2], self.tree[level * 2 + 1:level * 4:2], out=self.tree[level:level * 2])
+            level //= 2
+
+    def query(self, start: int, count: int) -> np.ndarray:
+        ''' Max of each line over `count` slots from `start` on, wrapping around the ring. NaN if they're all missing. '''
+        if count >= self.capacity:
+            return self.tree[1].copy()
+        start %= self.capacity
+        result = np.full(self.tree.shape[1], np.nan, dtype=np.float32)
+        end = start + count
+        for low, high in ((start, min(end, self.capacity)), (0, end - self.capacity)):
+            low += self.leaves
+            high += self.leaves
+            while low < high:
+                if low & 1:
+                    np.fmax(result, self.tree[low], out=result)
+                    low += 1
+                if high & 1:
+                    high -= 1
+                    np.fmax(result, self.tree[high], out=result)
+                low //= 2
+                high //= 2
+        return result
+
+class Decimator:
+    '''
+    Min/max decimation for plots with more points than pixels: the plot window is cut into chunks and each one
+    becomes two points, its min then its max, so peaks don't disappear and no column gets more than two.
+    The chunks are lined up on the entries themselves (counted from when we started) instead of on the plot window,
+    so as the plot scrolls only the newest chunk and the oldest one (partly off the plot) change.
+    The rest are worked out once and kept until they scroll off, so a frame costs about the same however long the plot is.
+    '''
+
+    def __init__(self):
+        self.chunk: int = 0
+        ''' entries per chunk '''
+        self.keys = None
+        ''' which chunk each slot of the cache holds, -1 if it's not worth keeping '''
+        self.minimum = self.maximum = self.times = None
+        self.result: tuple = (None, None)
+        ''' (what it was worked out for, what decimate() returned) '''
+
+    def decimate(self, minimum: np.ndarray, maximum: np.ndarray, end: int, complete: int, columns: int,
+                 times: np.ndarray = None, key=None) -> tuple:
+        '''
+        Decimates a plot window of every line at once to at most `columns` chunks.
+        - minimum, maximum: [line, entry] oldest first (the same array for raw samples)
+        - end: how many entries there have been up to the newest one, so we know where the chunks go
+        - complete: entries before this won't change anymore (the newest bucket of a tier is still filling up)
+        - times: when each entry was taken, to place the chunks by their average time
+        - key: anything that changes when the window does; asking again with the same key gets the same answer
+        Returns (points [line, min/max of each chunk], position of each chunk counted the same way as `end`,
+        average time of each chunk or None).
+        '''
+        if key is not None and self.result[0] == key:
+            return self.result[1]
+        lines, entries = minimum.shape
+        chunk = -(-entries // max(columns - 1, 1)) # one chunk may be cut off at each end
+        start = end - entries
+        chunks = np.arange(start // chunk, (end - 1) // chunk + 1)
+        capacity = columns + 2
+        if chunk != self.chunk or self.keys is None or self.keys.size != capacity or self.minimum.shape[0] != lines:
+            self.chunk = chunk
+            self.keys = np.full(capacity, -1, dtype=np.int64)
+            self.minimum = np.empty((lines, capacity), dtype=np.float32)
+            self.maximum = np.empty((lines, capacity), dtype=np.float32)
+            self.times = np.empty(capacity, dtype=np.float64)
+        slots = chunks % capacity
+        edges = np.maximum(chunks * chunk - start, 0)
+        ''' where each chunk starts in the window '''
+        stale = self.keys[slots] != chunks
+        stale[0] |= chunks[0] * chunk < start # the oldest chunk loses entries as it scrolls off
+        todo = np.flatnonzero(stale)
+        if todo.size > 8: # starting out, or the window jumped
+            todo = np.arange(chunks.size)
+            self.minimum[:, slots] = np.fmin.reduceat(minimum, edges, axis=1)
+            self.maximum[:, slots] = np.fmax.reduceat(maximum, edges, axis=1)
+            if times is not None:
+                present = ~np.isnan(times)
+                with np.errstate(invalid='ignore', divide='ignore'):
+                    self.times[slots] = np.add.reduceat(np.where(present, times, 0), edges) / np.add.reduceat(present, edges)
+        else:
+            stops = np.append(edges[1:], entries)
+            for index in todo:
+                span = slice(edges[index], stops[index])
+                self.minimum[:, slots[index]] = np.fmin.reduce(minimum[:, span], axis=1)
+                self.maximum[:, slots[index]] = np.fmax.reduce(maximum[:, span], axis=1)
+                if times is not None:
+                    present = times[span][~np.isnan(times[span])]
+                    self.times[slots[index]] = present.mean() if present.size > 0 else np.nan
+        # keep the chunks that are all on the plot and won't change anymore
+        final = (chunks[todo] * chunk >= start) & ((chunks[todo] + 1) * chunk <= complete)
+        self.keys[slots[todo]] = np.where(final, chunks[todo], -1)
+        points = np.empty((lines, chunks.size * 2), dtype=np.float32)
+        points[:, 0::2] = self.minimum[:, slots]
+        points[:, 1::2] = self.maximum[:, slots]
+        positions = start + (edges + np.append(edges[1:], entries) - 1) / 2
+        result = (points, positions, None if times is None else self.times[slots])
+        self.result = (key, result)
+        return result
+
+class HistoryTier:
+    '''
+    One coarse resolution of our history. Every `samples` samples are rolled up into a bucket that
+    keeps their min and max. The bucket being filled is always the newest entry,
+    so the plots don't lag behind by up to a whole bucket.
+    All of its state lives in the arrays it's given (see HistoryStore) so it can be kept in a file.
+    '''
+
+    def __init__(self, arrays: dict, name: str, samples: int):
+        self.samples = samples
+        self.buffer = arrays[name]
+        ''' [min/max, line, double-length ring] laid out the same way as HistoryStore.buffer '''
+        self.capacity = self.buffer.shape[2] // 2
+        self.current = arrays[f"{name}_current"]
+        ''' min/max of the bucket being filled '''
+        self.position = arrays[f"{name}_position"]
+        ''' [where the bucket being filled lives, how many samples are in it so far] '''
+        self.maxima = RunningMax(self.buffer.shape[1], self.capacity)
+        ''' of each bucket's max, see peaks() '''
+        self.maxima.rebuild(self.buffer[1, :, :self.capacity])
+        self.completed = allocate_history([('completed', (1,), np.int64)])[0]['completed']
+        ''' [buckets filled since we started], to line up the Decimator's chunks. Shared with a render process. '''
+        self.decimator = Decimator()
+
+    def reset(self) -> None:
+        self.buffer.fill(np.nan)
+        self.current.fill(np.nan)
+        self.position.fill(0)
+        self.maxima.rebuild(self.buffer[1, :, :self.capacity])
+        self.completed += self.capacity + 1 # whatever the Decimator kept is gone
+
+    def add(self, values: np.ndarray) -> None:
+        head, count = self.position
+        np.fmin(self.current[0], values, out=self.current[0])
+        np.fmax(self.current[1], values, out=self.current[1])
+        self.buffer[:, :, head] = self.current
+        self.buffer[:, :, head + self.capacity] = self.current
+        self.maxima.set(head, self.current[1])
+        self._advance(1)
+
+    def skip(self, samples: int) -> None:
+        ''' Moves ahead as if `samples` samples went missing '''
+        head, count = self.position
+        fill = min(samples, self.samples - count) # finish off the current bucket
+        samples -= fill
+        self._advance(fill)
+        if samples <= 0:
+            return
+        head = self.position[0]
+        buckets, remainder = divmod(samples, self.samples)
+        clear_ring(self.buffer, head, buckets + 1)
+        self.maxima.rebuild(self.buffer[1, :, :self.capacity])
+        self.position[0] = (head + buckets) % self.capacity
+        self.position[1] = remainder
+        self.completed += buckets
+
+    def _advance(self, samples: int) -> None:
+        self.position[1] += samples
+        if self.position[1] >= self.samples:
+            self.position[0] = (self.position[0] + 1) % self.capacity
+            self.position[1] = 0
+            self.completed += 1
+            self.current.fill(np.nan)
+
+    def view(self, row: int, entries: int) -> np.ndarray:
+        ''' The newest `entries` buckets of a line as [min/max, bucket], oldest first (a view) '''
+        head, count = self.position
+        end = head + self.capacity + (1 if count > 0 else 0)
+        return self.buffer[:, row, end - entries:end]
+
+    def window(self, entries: int) -> np.ndarray:
+        ''' view() for every line at once: [min/max, line, bucket] '''
+        head, count = self.position
+        end = head + self.capacity + (1 if count > 0 else 0)
+        return self.buffer[:, :, end - entries:end]
+
+    def end(self) -> int:
+        ''' How many buckets there have been, counting the one being filled '''
+        return int(self.completed[0]) + (1 if self.position[1] > 0 else 0)
+
+    def peaks(self, entries: int) -> np.ndarray:
+        ''' The highest value of every line over the newest `entries` buckets (the ones view() gives) '''
+        head, count = self.position
+        end = head + (1 if count > 0 else 0)
+        return self.maxima.query(end - entries, entries)
+
+class HistoryStore:
+    '''
+    Sample history for every line of every plot, kept in preallocated float32 numpy arrays.
+    Missing samples are NaN. Each line's ring buffer is twice the history length and every sample
+    is written to both halves, so the latest `size` samples are always one contiguous slice:
+    appending is O(1) and the renderers get views they can plot without copying anything.
+    Plots longer than RAW_HISTORY_LIMIT samples are drawn from a coarser HistoryTier instead, with the smallest buckets
+    that keep it about that size (and at least two per pixel column), so memory use and drawing time stay the same
+    no matter how long the plot is and resolution drops off gradually as it gets longer.
+    With a `path` everything is kept in a memory-mapped file (see allocate_history()) and picked back up
+    on the next start, minus whatever is older than the plot.
+    Every sample keeps the time it was taken, so the plots can put it where it really belongs (see ages()).
+    update_data() calls append() once per sample, the renderers read with series() and ages().
+    '''
+
+    def __init__(self, size: int, lines_per_plot: list, sample_time: float, path: str = None, columns: int = 320):
+        self.size = min(size, RAW_HISTORY_LIMIT)
+        self.window = size
+        self.sample_time = sample_time
+        self.rows: list = []
+        ''' rows[plot][line] = row of self.buffer that line lives in '''
+        for count in lines_per_plot:
+            start = sum(len(rows) for rows in self.rows)
+            self.rows.append(range(start, start + count))
+        lines = sum(lines_per_plot)
+        # too long for the raw samples: roll them up into buckets, as small as we can without going past
+        # RAW_HISTORY_LIMIT of them (or 4 per pixel column on a wider display), so there's at least 2 per column
+        tiers = []
+        self.entries: int = size
+        ''' How many entries of the tier we draw from make up the plot '''
+        if size > self.size:
+            limit = max(RAW_HISTORY_LIMIT, columns * 4 + 1)
+            samples = -(-(size - 1) // (limit - 1))
+            self.entries = -(-(size - 1) // samples) + 1
+            tiers.append((self.entries, samples))
+        layout = [
+            ('raw', (lines, self.size * 2), np.float32),
+            ('times', (self.size * 2,), np.float64),
+            ('position', (1,), np.int64),
+            ('last_sample', (1,), np.float64),
+        ]
+        for index, (capacity, samples) in enumerate(tiers):
+            layout += [
+                (f"tier{index}", (2, lines, capacity * 2), np.float32),
+                (f"tier{index}_current", (2, lines), np.float32),
+                (f"tier{index}_position", (2,), np.int64),
+            ]
+        # a file from a different REFRESH_RATE or plot length can't be used as-is
+        arrays, reattached = allocate_history(layout, path, f"{sample_time} {tiers}")
+        self.file = arrays.get('file')
+        self.buffer = arrays['raw']
+        self.times = arrays['times']
+        ''' wall clock time of each sample in self.buffer, NaN if it's missing '''
+        self.position = arrays['position']
+        ''' [where the next sample goes] '''
+        self.last_sample = arrays['last_sample']
+        ''' [wall clock time of the last sample] '''
+        self.tiers: list = [HistoryTier(arrays, f"tier{index}", samples) for index, (_, samples) in enumerate(tiers)]
+        self.grid: dict = {}
+        ''' evenly spaced x-values by point count, see ages() '''
+        self.ages_cache: tuple = (None, None)
+        ''' (what it was worked out for, the x-values) from the last ages() call '''
+        self.maxima = RunningMax(lines, self.size)
+        ''' of the raw samples, see peak() '''
+        self.added = allocate_history([('added', (1,), np.int64)])[0]['added']
+        ''' [samples added since we started, missing ones included], to line up the Decimator's chunks '''
+        self.decimator = Decimator()
+        if reattached == False:
+            self.reset()
+        else:
+            self.catch_up()
+
+    def reset(self) -> None:
+        self.buffer.fill(np.nan)
+        self.times.fill(np.nan)
+        self.position.fill(0)
+        self.last_sample.fill(0)
+        self.maxima.rebuild(self.buffer[:, :self.size])
+        self.added += self.size + 1 # whatever the Decimator kept is gone
+        for tier in self.tiers:
+            tier.reset()
+
+    def catch_up(self) -> None:
+        '''
+        After picking up history from a file, leave a gap for the time we weren't running.
+        If that's longer than the whole plot there's nothing worth keeping.
+        '''
+        missed = round((time.time() - self.last_sample[0]) / self.sample_time) - 1
+        if missed >= self.window or missed < -1:
+            self.reset()
+            return
+        self.maxima.rebuild(self.buffer[:, :self.size])
+        if missed > 0:
+            self.skip(missed)
+        if DEBUG == True:
+            print(f"• Picked up previous history, {max(missed, 0)} sample(s) missed while stopped.")
+
+    def skip(self, samples: int) -> None:
+        ''' Moves ahead as if `samples` samples went missing '''
+        head = int(self.position[0])
+        clear_ring(self.buffer, head, samples)
+        clear_ring(self.times, head, samples)
+        self.maxima.rebuild(self.buffer[:, :self.size])
+        self.position[0] = (head + samples) % self.size
+        self.added += samples
+        for tier in self.tiers:
+            tier.skip(samples)
+
+    def append(self, sample: list, timestamp: float = None) -> None:
+        '''
+        Adds one sample to every line. Laid out as sample[plot][line], None for missing values.
+        `timestamp` is the wall clock time it was taken, now if not given.
+        '''
+        values = np.array([np.nan if value is None else value for plot in sample for value in plot], dtype=np.float32)
+        if timestamp is None:
+            timestamp = time.time()
+        head = int(self.position[0])
+        self.buffer[:, head] = values
+        self.buffer[:, head + self.size] = values
+        self.maxima.set(head, values)
+        self.times[head] = timestamp
+        self.times[head + self.size] = timestamp
+        self.position[0] = (head + 1) % self.size
+        self.added += 1
+        self.last_sample[0] = timestamp
+        for tier in self.tiers:
+            tier.add(values)
+
+    def flush(self) -> None:
+        ''' Makes sure a history file is written out, the OS does this on its own otherwise '''
+        if self.file is not None:
+            self.file.flush()
+
+    def line(self, plot: int, line: int) -> np.ndarray:
+        ''' The full resolution history of one line, oldest first. This is a view into the store, treat it as read-only. '''
+        head = int(self.position[0])
+        return self.buffer[self.rows[plot][line], head:head + self.size]
+
+    def series(self, plot: int, line: int, columns: int) -> np.ndarray:
+        '''
+        The whole plot window of one line, oldest first, ready to draw across `columns` pixels.
+        Short plots get the samples as-is. If there are more points than pixels (or we're drawing from a coarser tier),
+        it's cut down to a min and max for each column so peaks don't disappear, see decimated().
+        '''
+        if not self.tiers:
+            values = self.line(plot, line)
+            if values.size <= columns * 2:
+                return values
+        return self.decimated(columns)[0][self.rows[plot][line]]
+
+    def decimated(self, columns: int) -> tuple:
+        ''' The plot window of every line through a Decimator; worked out once per sample for all of them '''
+        key = (int(self.added[0]), float(self.last_sample[0]), columns)
+        if self.tiers:
+            tier = self.tiers[-1]
+            window = tier.window(self.entries)
+            return tier.decimator.decimate(window[0], window[1], tier.end(), int(tier.completed[0]), columns, key=key)
+        head = int(self.position[0])
+        window = self.buffer[:, head:head + self.size]
+        added = int(self.added[0])
+        return self.decimator.decimate(window, window, added, added, columns, self.times[head:head + self.size], key)
+
+    def evenly_spaced(self, points: int) -> np.ndarray:
+        ''' x-values (seconds ago) for `points` evenly spaced points across the plot window '''
+        if points not in self.grid:
+            self.grid[points] = np.linspace(self.sample_time * (self.window - 1), 0, points)
+        return self.grid[points]
+
+    def ages(self, columns: int) -> np.ndarray:
+        '''
+        x-values for series(): how many seconds before the newest sample each point was taken.
+        The same for every line, since they're all sampled together. Raw samples go where their timestamps say;
+        slots without one (missed, or from before we started) and the coarser tiers sit on the REFRESH_RATE grid.
+        Never increases from one point to the next, so the renderers can treat it as sorted.
+        '''
+        key = (int(self.position[0]), float(self.last_sample[0]), columns)
+        if self.ages_cache[0] == key:
+            return self.ages_cache[1]
+        head = int(self.position[0])
+        times = self.times[head:head + self.size]
+        if self.tiers:
+            # both points of a chunk go in the middle of its buckets
+            tier = self.tiers[-1]
+            _, positions, _ = self.decimated(columns)
+            ages = np.clip((tier.end() - 1 - positions) * (tier.samples * self.sample_time), 0, self.sample_time * (self.window - 1))
+            ages = np.repeat(ages, 2)
+        elif self.size > columns * 2:
+            # both points of a chunk go at its average time, or where it sits on the grid if it has none
+            _, positions, chunk_times = self.decimated(columns)
+            ages = times[-1] - chunk_times
+            missing = np.isnan(ages)
+            ages[missing] = ((int(self.added[0]) - 1 - positions) * self.sample_time)[missing]
+            np.minimum.accumulate(ages, out=ages)
+            ages = np.repeat(ages, 2)
+        else:
+            ages = times[-1] - times
+            missing = np.isnan(ages)
+            ages[missing] = self.evenly_spaced(self.size)[missing]
+            np.minimum.accumulate(ages, out=ages)
+        self.ages_cache = (key, ages)
+        return ages
+
+    def newest(self, columns: int) -> float:
+        '''
+        Wall clock time of the newest sample, the one ages() counts back from. Lets the numpy renderer scroll
+        the plots (STRIP_CHART) instead of drawing them from scratch. None unless series() gives the samples as-is,
+        since otherwise the points don't just move over when a sample is added.
+        '''
+        if self.tiers or self.size > columns * 2:
+            return None
+        newest = float(self.times[int(self.position[0]) - 1 + self.size])
+        return None if np.isnan(newest) else newest
+
+    def peak(self, plot: int) -> float:
+        '''
+        The highest value of any line in a plot over the whole plot window (NaN if there's nothing there),
+        the same as the max of its series() but without going through the history, see RunningMax.
+        '''
+        if self.tiers:
+            peaks = self.tiers[-1].peaks(self.entries)
+        else:
+            peaks = self.maxima.query(0, self.size)
+        rows = self.rows[plot]
+        return float(np.fmax.reduce(peaks[rows.start:rows.stop])) if len(rows) > 0 else np.nan
+
+    def plot(self, plot: int, columns: int) -> list:
+        ''' series() for every line in a plot '''
+        return [self.series(plot, line, columns) for line in range(len(self.rows[plot]))]
+
+    def latest(self, plot: int, line: int) -> float:
+        ''' The last sample appended to a line '''
+        return float(self.buffer[self.rows[plot][line], self.position[0] - 1 + self.size])
+
+history = HistoryStore(HIST_SIZE, [len(plot['line_config']) for plot in PLOT_CONFIG], REFRESH_RATE, HISTORY_FILE, disp.width)
+
+def plot_width(plot: int) -> int:
+    ''' How many pixels across a plot is, so its lines get no more points than it can show (see HistoryStore.series()) '''
+    if RENDER_BACKEND == "numpy":
+        return engine.boxes[plot][2]
+    return max(round(ax[plot].bbox.width), 2)
+startup_phase("history")
+
+#==| Plot setup |=============================================================
 #=============================================================================
 
-# Setup plot figure
-matplotlib.style.use('fast')
-plt.ioff
-plt.style.use(matplotx.styles.ayu['dark']) # Ayumu Uehara?
-fig, ax = plt.subplots(5, 1, figsize=(disp.width / 100, disp.height / 100),
-                       gridspec_kw={'height_ratios': [4, 1, 4, 4, 2]})
-fig.subplots_adjust(0.0,0.12,1,0.98) # adjust extent of margins (left, bottom, right, top [haha 98])
-plt.rcParams.update({'font.size': 7})
-
-# Set up text objects we can update
-bbox_setting = dict(facecolor='black', edgecolor='None', pad=0.3, alpha=0.25)
-if DEBUG == True:
-    unraid_ver_text = ax[4].annotate(f"Unraid version {UNRAID_VERSION}",
-                                     [0, -0.2], xycoords='axes fraction',
-                                     verticalalignment='top',
-                                     horizontalalignment='left',
-                                     alpha=0.5, fontsize=6)    
-    plot_settings = ax[4].annotate(f"Refresh: {REFRESH_RATE}s | Plot: {round(REFRESH_RATE * (HIST_SIZE - 1),1)}s",
-                                   [0, -0.5], xycoords='axes fraction',
-                                   verticalalignment='top',
-                                   horizontalalignment='left',
-                                   alpha=0.5, fontsize=6)
-    debug_text = ax[4].annotate('', [1, -0.5], xycoords='axes fraction', 
-                                verticalalignment='top',
-                                horizontalalignment='right',
-                                family='monospace',fontsize=6, alpha=0.5)
-    frame_number_text = ax[4].annotate('', [1, -0.25], xycoords='axes fraction', 
+def annotate_axes(ax, text, fontsize: float = 10):
+    ''' Puts text in the center of the plots '''
+    return ax.text(0.5, 0.5, text, transform=ax.transAxes,
+                   ha='center', va='center', fontsize=fontsize, 
+                   fontstyle='italic', fontweight='normal', alpha=0.4)
+
+def invalidate_background(event = None) -> None:
+    ''' Throw away the cached background so that the next frame recaptures it. '''
+    global blit_background
+    blit_background = None
+
+blit_background = None
+''' Cached static background of our figure when blitting. None = next frame is a full redraw. '''
+
+FIGURE_TEMPLATE_VERSION: int = 1
+''' Bump this when build_figure() changes in a way the template key below wouldn't notice '''
+
+def build_figure() -> dict:
+    '''
+    Creates our figure and everything on it from scratch. Text that depends on this system (host, IP, versions),
+    the x-limits and the line data are left empty; they're filled in after loading or building the figure.
+    Returns the figure, its axes, the artists we update and the rcParams our style set.
+    '''
+    import matplotx
+    # Setup plot figure
+    matplotlib.style.use('fast')
+    matplotlib.style.use(matplotx.styles.ayu['dark']) # Ayumu Uehara?
+    fig = Figure(figsize=(disp.width / 100, disp.height / 100))
+    ax = fig.subplots(5, 1, gridspec_kw={'height_ratios': [4, 1, 4, 4, 2]})
+    fig.subplots_adjust(0.0,0.12,1,0.98) # adjust extent of margins (left, bottom, right, top [haha 98])
+    matplotlib.rcParams.update({'font.size': 7})
+    style = {key: matplotlib.rcParams[key] for key in [*matplotlib.style.library['fast'], *matplotx.styles.ayu['dark'], 'font.size']}
+
+    # Set up text objects we can update
+    bbox_setting = dict(facecolor='black', edgecolor='None', pad=0.3, alpha=0.25)
+    if DEBUG == True:
+        unraid_ver_text = ax[4].annotate('',
+                                         [0, -0.2], xycoords='axes fraction',
+                                         verticalalignment='top',
+                                         horizontalalignment='left',
+                                         alpha=0.5, fontsize=6)    
+        plot_settings = ax[4].annotate('',
+                                       [0, -0.5], xycoords='axes fraction',
                                        verticalalignment='top',
-                                       horizontalalignment='right',
-                                       family='monospace', fontsize=5, alpha=0.5)
-host_test = ax[0].annotate(f"{UNRAID_HOSTNAME} {UNRAID_IP}",
-                           [0.5, 1], xycoords='axes fraction',
-                           verticalalignment='center',
-                           horizontalalignment='center',
-                           family='monospace', fontsize=5, alpha=0.5)
-cpu_text = ax[0].annotate('', [0.5, 0.3], xycoords='axes fraction', 
-                          verticalalignment='center',
-                          horizontalalignment='center',
-                          fontweight='black',
-                          bbox=bbox_setting)
-uptime_text = ax[2].annotate('', [0.5, 1.1], xycoords='axes fraction', 
-                             verticalalignment='top',
-                             horizontalalignment='center',
-                             fontvariant='small-caps')
-disk_text = ax[2].annotate('', [0.5, 0.3], xycoords='axes fraction', 
-                           verticalalignment='center',
-                           horizontalalignment='center',
-                           fontweight='black',
-                           bbox=bbox_setting)
-network_text = ax[3].annotate('', [0.5, 0.3], xycoords='axes fraction',
+                                       horizontalalignment='left',
+                                       alpha=0.5, fontsize=6)
+        debug_text = ax[4].annotate('', [1, -0.5], xycoords='axes fraction', 
+                                    verticalalignment='top',
+                                    horizontalalignment='right',
+                                    family='monospace',fontsize=6, alpha=0.5)
+        frame_number_text = ax[4].annotate('', [1, -0.25], xycoords='axes fraction', 
+                                           verticalalignment='top',
+                                           horizontalalignment='right',
+                                           family='monospace', fontsize=5, alpha=0.5)
+    host_test = ax[0].annotate('',
+                               [0.5, 1], xycoords='axes fraction',
+                               verticalalignment='center',
+                               horizontalalignment='center',
+                               family='monospace', fontsize=5, alpha=0.5)
+    cpu_text = ax[0].annotate('', [0.5, 0.3], xycoords='axes fraction', 
                               verticalalignment='center',
                               horizontalalignment='center',
                               fontweight='black',
                               bbox=bbox_setting)
-memory_text = ax[4].annotate('', [0.5, 0.725], xycoords='axes fraction', 
-                             verticalalignment='center',
-                             horizontalalignment='center',
-                             fontweight='black')
-storage_text = ax[4].annotate('', [0.5, 0.225], xycoords='axes fraction', 
-                              verticalalignment='center',
-                              horizontalalignment='center',
-                              fontweight='black')
+    uptime_text = ax[2].annotate('', [0.5, 1.1], xycoords='axes fraction', 
+                                 verticalalignment='top',
+                                 horizontalalignment='center',
+                                 fontvariant='small-caps')
+    disk_text = ax[2].annotate('', [0.5, 0.3], xycoords='axes fraction', 
+                               verticalalignment='center',
+                               horizontalalignment='center',
+                               fontweight='black',
+                               bbox=bbox_setting)
+    network_text = ax[3].annotate('', [0.5, 0.3], xycoords='axes fraction',
+                                  verticalalignment='center',
+                                  horizontalalignment='center',
+                                  fontweight='black',
+                                  bbox=bbox_setting)
+    memory_text = ax[4].annotate('', [0.5, 0.725], xycoords='axes fraction', 
+                                 verticalalignment='center',
+                                 horizontalalignment='center',
+                                 fontweight='black')
+    storage_text = ax[4].annotate('', [0.5, 0.225], xycoords='axes fraction', 
+                                  verticalalignment='center',
+                                  horizontalalignment='center',
+                                  fontweight='black')
+    overlay_texts: dict = {
+        'cpu': cpu_text,
+        'disk': disk_text,
+        'storage': storage_text,
+        'memory': memory_text,
+        'network': network_text,
+        'uptime': uptime_text,
+    }
+    ''' Text objects that update_plot() refreshes every frame, same names as fastrender's '''
+    if DEBUG == True:
+        overlay_texts['debug'] = debug_text
+        overlay_texts['frame_number'] = frame_number_text
 
-def annotate_axes(ax, text, fontsize: float = 10) -> None:
-    ''' Puts text in the center of the plots '''
-    ax.text(0.5, 0.5, text, transform=ax.transAxes,
-            ha='center', va='center', fontsize=fontsize, 
-            fontstyle='italic', fontweight='normal', alpha=0.4)
+    title_texts: list = []
 
-try:
-    # Setup plot axis
-    for plot, a in enumerate(ax):
-        # custom settings
-        if 'title' in PLOT_CONFIG[plot]:
-            annotate_axes(ax[plot],PLOT_CONFIG[plot]['title'])
-        if 'ylim' in PLOT_CONFIG[plot]:
-            a.set_ylim(PLOT_CONFIG[plot]['ylim'])
-        if plot == 1: # this is our CPU core heatmap
-            a.axis('off')
-            # a.yaxis.set_ticklabels([]) # turn off y-tick labels
-            # a.set_yticks([])
-            continue
-        a.xaxis.set_ticklabels([])
-        a.tick_params(axis='y', direction='in', pad=-20, labelsize=5)
-        a.tick_params(axis='y', which='minor', left=False)
-        a.tick_params(axis='x', which='minor', bottom=False)
-        if plot == 4: # this is our barplot
-            a.tick_params(bottom = False, left=False)
-        # turn off all spines
-        a.spines['top'].set_visible(False)  
-        a.spines['bottom'].set_visible(False)  
-        a.spines['right'].set_visible(False)  
-        a.spines['left'].set_visible(False)
-        # limit and invert x time axis
-        if plot == 4: # we don't need to set the x-limits here
-            continue
-        a.set_xlim(min(x_time), max(x_time))
-        a.invert_xaxis()
-
-    # Setup plot lines
-    plot_lines: list = []
-    for plot, config in enumerate(PLOT_CONFIG):
-        lines: list = []
-        for index, line_config in enumerate(config['line_config']):
-            # create line
-            line, = ax[plot].plot(x_time, y_data[plot][index])
+    try:
+        # Setup plot axis
+        for plot, a in enumerate(ax):
             # custom settings
-            if 'color' in line_config:
-                line.set_color(line_config['color'])
-            if 'width' in line_config:
-                line.set_linewidth(line_config['width'])
-            if 'style' in line_config:
-                line.set_linestyle(line_config['style'])
-            if 'alpha' in line_config:
-                line.set_alpha(line_config['alpha'])
-            # add line to list
-            lines.append(line)
-        plot_lines.append(lines)
-        # annotate_axes(ax[plot],AX_NAME[plot])
+            if 'title' in PLOT_CONFIG[plot]:
+                title_texts.append(annotate_axes(ax[plot],PLOT_CONFIG[plot]['title']))
+            if 'ylim' in PLOT_CONFIG[plot]:
+                a.set_ylim(PLOT_CONFIG[plot]['ylim'])
+            if plot == 1: # this is our CPU core heatmap
+                a.axis('off')
+                # a.yaxis.set_ticklabels([]) # turn off y-tick labels
+                # a.set_yticks([])
+                continue
+            a.xaxis.set_ticklabels([])
+            a.tick_params(axis='y', direction='in', pad=-20, labelsize=5)
+            a.tick_params(axis='y', which='minor', left=False)
+            a.tick_params(axis='x', which='minor', bottom=False)
+            if plot == 4: # this is our barplot
+                a.tick_params(bottom = False, left=False)
+            # turn off all spines
+            a.spines['top'].set_visible(False)  
+            a.spines['bottom'].set_visible(False)  
+            a.spines['right'].set_visible(False)  
+            a.spines['left'].set_visible(False)
+            # limit and invert x time axis
+            if plot == 4: # we don't need to set the x-limits here
+                continue
+            a.invert_xaxis() # the x-limits are set once the figure is ready, see below
+
+        # Setup plot lines
+        plot_lines: list = []
+        for plot, config in enumerate(PLOT_CONFIG):
+            lines: list = []
+            for index, line_config in enumerate(config['line_config']):
+                # create line, the data goes in once the figure is ready
+                line, = ax[plot].plot([], [])
+                # custom settings
+                if 'color' in line_config:
+                    line.set_color(line_config['color'])
+                if 'width' in line_config:
+                    line.set_linewidth(line_config['width'])
+                if 'style' in line_config:
+                    line.set_linestyle(line_config['style'])
+                if 'alpha' in line_config:
+                    line.set_alpha(line_config['alpha'])
+                # add line to list
+                lines.append(line)
+            plot_lines.append(lines)
+            # annotate_axes(ax[plot],AX_NAME[plot])
         
-    # Make plot 1 a heatmap
-    heatmap = ax[1].imshow(np.matrix(np.zeros(CORE_COUNT)),
-                           cmap='gist_heat', vmin=0, vmax=100, aspect='auto', alpha=0.5)
-
-    # Make plot 4 a horizontal bar graph
-    barplot = ax[4].barh([1, 2], [0, 0], color=BARPLOT_COLORS)
-    ax[4].set_xlim(right=100) 
-    ax[4].set_yticks([1, 2],["Array", "Memory"])        
-except:
-    raise Exception("Failed to create plot. This may be caused by incorrect values in \'PLOT_CONFIG\'")
-if DEBUG == True:
-    print(f"• Plot length: {HIST_SIZE} samples")
+        # Make plot 1 a heatmap
+        heatmap = ax[1].imshow(np.matrix(np.zeros(CORE_COUNT)),
+                               cmap='gist_heat', vmin=0, vmax=100, aspect='auto', alpha=0.5)
+
+        # Make plot 4 a horizontal bar graph
+        barplot = ax[4].barh([1, 2], [0, 0], color=BARPLOT_COLORS)
+        ax[4].set_xlim(right=100) 
+        ax[4].set_yticks([1, 2],["Array", "Memory"])        
+    except:
+        raise Exception("Failed to create plot. This may be caused by incorrect values in \'PLOT_CONFIG\'")
+    figure = {'fig': fig, 'ax': ax, 'style': style, 'overlay_texts': overlay_texts, 'title_texts': title_texts,
+              'plot_lines': plot_lines, 'heatmap': heatmap, 'barplot': barplot, 'host_text': host_test}
+    if DEBUG == True:
+        figure['unraid_ver_text'] = unraid_ver_text
+        figure['plot_settings'] = plot_settings
+    return figure
+
+def figure_template_key() -> str:
+    ''' Everything that changes what build_figure() makes. A different key means the template is out of date. '''
+    key = repr((FIGURE_TEMPLATE_VERSION, VERSION, sys.version, matplotlib.__version__, disp.width, disp.height,
+                PLOT_CONFIG, BARPLOT_COLORS, CORE_COUNT, DEBUG))
+    return hashlib.sha1(key.encode()).hexdigest()
+
+def owned_privately(path) -> bool:
+    ''' True if `path` (or an open file descriptor) is ours and nobody else can write to it '''
+    info = os.stat(path)
+    return info.st_uid == os.getuid() and info.st_mode & (stat.S_IWGRP | stat.S_IWOTH) == 0
+
+def load_figure() -> dict:
+    '''
+    Gets our figure from the template in CACHE_DIR if there is an up to date one, otherwise builds it and saves
+    a template for next time. Unpickling a laid-out figure is much quicker than building it, and we don't
+    need matplotx at all then.
+    Unpickling runs whatever code the file asks for, so the template is only used if it and CACHE_DIR are ours alone.
+    '''
+    if CACHE_DIR is None or cache_persistent == False:
+        return build_figure()
+    try:
+        trusted = owned_privately(CACHE_DIR)
+    except OSError:
+        trusted = False
+    if trusted == False:
+        print_stderr(f"Notice: Not using a figure template, '{CACHE_DIR}' can be written to by other users.")
+        return build_figure()
+    template_path = f"{CACHE_DIR}/figure.pickle"
+    key = figure_template_key()
+    try:
+        with open(template_path, 'rb') as file:
+            if owned_privately(file.fileno()) == False:
+                raise PermissionError
+            template = pickle.load(file)
+        if template['key'] == key:
+            matplotlib.rcParams.update(template['figure']['style'])
+            if DEBUG == True:
+                print(f"• Loaded figure template from {template_path}")
+            return template['figure']
+    except Exception: # missing, out of date or unreadable; just build a new one
+        pass
+    figure = build_figure()
+    try:
+        replace_file(template_path, lambda file: pickle.dump({'key': key, 'figure': figure}, file, protocol=pickle.HIGHEST_PROTOCOL), 0o600)
+    except Exception:
+        print_stderr(f"Notice: Unable to save figure template to \'{template_path}\'.")
+    return figure
+
+if RENDER_BACKEND == "matplotlib":
+    figure = load_figure()
+    fig = figure['fig']
+    FigureCanvasAgg(fig)
+    ax = figure['ax']
+    overlay_texts = figure['overlay_texts']
+    title_texts = figure['title_texts']
+    plot_lines = figure['plot_lines']
+    heatmap = figure['heatmap']
+    barplot = figure['barplot']
+    figure['host_text'].set_text(f"{UNRAID_HOSTNAME} {UNRAID_IP}")
+    if DEBUG == True:
+        unraid_ver_text = figure['unraid_ver_text']
+        unraid_ver_text.set_text(f"Unraid version {UNRAID_VERSION}")
+        plot_settings = figure['plot_settings']
+        plot_settings.set_text(f"Refresh: {REFRESH_RATE}s | Plot: {round(REFRESH_RATE * (HIST_SIZE - 1),1)}s")
+    del figure
+    for plot, a in enumerate(ax):
+        if plot == 1 or plot == 4:
+            continue
+        a.set_xlim(REFRESH_RATE * (HIST_SIZE - 1), 0) # inverted time axis
+    for plot, lines in enumerate(plot_lines):
+        for index, line in enumerate(lines):
+            line.set_data(history.ages(plot_width(plot)), history.series(plot, index, plot_width(plot)))
+    if DEBUG == True:
+        print(f"• Plot length: {HIST_SIZE} samples")
+
+    # Everything that changes between frames, in the order they're drawn on top of the static background
+    blit_artists: list = [heatmap, *barplot.patches]
+    for lines in plot_lines:
+        blit_artists.extend(lines)
+    blit_texts: list = [overlay_texts[name] for name in ('cpu', 'uptime', 'disk', 'network', 'memory', 'storage')]
+    ''' The text readouts, drawn after blit_artists. Kept apart so draw_text() can redraw just these. '''
+    if DEBUG == True:
+        blit_texts.extend([overlay_texts['debug'], overlay_texts['frame_number']])
+    blit_overlays: list = [ax[4].yaxis, *title_texts]
+    ''' Static artists that sit on top of our animated ones (bar labels, plot titles) and get redrawn over them '''
+    if BLITTING == True:
+        # animated artists are skipped by canvas.draw() so they don't end up in the cached background
+        for artist in blit_artists + blit_texts + blit_overlays:
+            artist.set_animated(True)
+        if DEBUG == True:
+            print(f"• Blitting enabled with {len(blit_artists) + len(blit_texts)} animated artists.")
+
+    fig.canvas.mpl_connect('resize_event', invalidate_background)
+else:
+    engine = fastrender.Renderer(disp.width, disp.height, PLOT_CONFIG, BARPLOT_COLORS,
+                                 REFRESH_RATE * (HIST_SIZE - 1), DEBUG, STRIP_CHART)
+    engine.texts['host'] = f"{UNRAID_HOSTNAME} {UNRAID_IP}"
+    if DEBUG == True:
+        engine.texts['unraid_ver'] = f"Unraid version {UNRAID_VERSION}"
+        engine.texts['plot_settings'] = f"Refresh: {REFRESH_RATE}s | Plot: {round(REFRESH_RATE * (HIST_SIZE - 1),1)}s"
+        print(f"• Plot length: {HIST_SIZE} samples")
+startup_phase("plot setup")
 
 #==| Main threads definitons |================================================
 #=============================================================================
 
-def update_data() -> None:
+last_snapshot = None
+''' The counters read by the last update_data() call, see take_snapshot() '''
+WALL_CLOCK_OFFSET: float = time.time() - time.monotonic()
+''' Turns time.monotonic() into wall clock time, fixed at startup so clock adjustments don't move our samples around '''
+
+class TickScheduler:
     '''
-    Generates data for our plot.
-    Sends workers to run in our thread pool, waits for them to finish,
-    then returns. The workers sleep for REFRESH_RATE then append to y_data
-    and current_data[].
-    General form is:
-           y_data[plot][line].append(new_data_point)
-    '''
-
-    # data_start = round(time.time(), 3) # to check how long this function takes
-    def cpu_data_load() -> None:
-        cpu_percs = psutil.cpu_percent(interval=REFRESH_RATE, percpu=False)
-        y_data[0][0].append(cpu_percs)
-        cpu_freq = psutil.cpu_freq()         
-        cpu_f_ghz = round(cpu_freq.current / 1000, 2)
-        current_data[0] = f"{cpu_percs}% {cpu_f_ghz} GHz"
-        if cpu_temp_available == False:
-            y_data[0][1].append(None)
-            current_data[1] = None
-        else:
-            cpu_temp = psutil.sensors_temperatures()[CPU_TEMP_SENSOR][0].current
-            y_data[0][1].append(cpu_temp)
-            current_data[1] = f"{round(cpu_temp, 1)}°C"
-        
-    def cpu_data_core() -> None:
-        global cpu_percs_cores
-        cpu_percs_cores_tmp = psutil.cpu_percent(interval=REFRESH_RATE, percpu=True)
-        cpu_percs_cores = cpu_percs_cores_tmp # write to cpu_percs_cores after blocking rather than blocking cpu_percs_cores
-        y_data[1][0].append(1) # we want a max y-value of 1 for this plot
-
-    def disk_data() -> None:
-        # system-wide disk I/O, in MiB/s
-        disk_start = psutil.disk_io_counters(nowrap=True)
-        time.sleep(REFRESH_RATE)
-        disk_finish = psutil.disk_io_counters(nowrap=True)
-        iospeed_read = abs(disk_finish.read_bytes - disk_start.read_bytes) / REFRESH_RATE
-        iospeed_write = abs(disk_finish.write_bytes - disk_start.write_bytes) / REFRESH_RATE
-        y_data[2][0].append(iospeed_read / 1048576)
-        y_data[2][1].append(iospeed_write / 1048576)
-        current_data[2] = f"R:{bytes2human(iospeed_read)}/s"
-        current_data[3] = f"W:{bytes2human(iospeed_write)}/s"
-
-    def network_data() -> None:
-        # network speed, in MiB/s
-        nic_isup: bool = True
+    Paces the sampler on a fixed grid of time.monotonic() deadlines, one every `period` seconds,
+    so however long a loop takes the samples don't drift and a day is always 86400 / period ticks.
+    A deadline that was already a whole period gone by the time we got to it is skipped rather than
+    fired late, and the ticks that were skipped are counted and handed back so the history can leave gaps for them.
+    A period of 0 doesn't wait at all.
+    '''
+
+    def __init__(self, period: float):
+        self.period = period
+        self.deadline = time.monotonic() + period
+        ''' when the next tick is due '''
+        self.missed: int = 0
+        ''' ticks skipped so far '''
+        self.ticks: int = 0
+        ''' deadlines gone by so far, skipped ones included '''
+
+    def advance(self) -> int:
+        ''' Moves to the next deadline still ahead of us. Returns how many were skipped along the way. '''
+        if self.period <= 0:
+            self.ticks += 1
+            return 0
+        missed = max(int((time.monotonic() - self.deadline) // self.period), 0)
+        self.deadline += (missed + 1) * self.period
+        self.missed += missed
+        self.ticks += missed + 1
+        return missed
+
+    def due(self) -> bool:
+        ''' For things that only need to happen about on time: True (once) if a deadline has passed '''
+        if time.monotonic() < self.deadline:
+            return False
+        self.advance()
+        return True
+
+    def wait(self) -> int:
+        ''' Sleeps until the next deadline. Returns how many ticks were skipped because we were already late. '''
+        remaining = self.deadline - time.monotonic()
+        if remaining > 0:
+            time.sleep(remaining)
+        return self.advance()
+
+    async def wait_async(self) -> int:
+        ''' wait() for an asyncio event loop '''
+        remaining = self.deadline - time.monotonic()
+        if remaining > 0:
+            await asyncio.sleep(remaining)
+        return self.advance()
+
+tick_scheduler = None
+''' Paces update_data(), created on its first sample since REFRESH_RATE can still change during startup '''
+
+def take_snapshot() -> dict:
+    '''
+    Reads all the counters we turn into rates in one go, along with when they were read.
+    Uses proc_reader where it can and psutil for anything else.
+    '''
+    snapshot = {'time': time.monotonic()}
+    if proc_reader is not None:
+        snapshot.update(proc_reader.read())
+    if 'cpu' not in snapshot:
+        snapshot['cpu'] = cpu_busy_total(psutil.cpu_times(percpu=False))
+        snapshot['cores'] = [cpu_busy_total(core) for core in psutil.cpu_times(percpu=True)]
+    if 'disk' not in snapshot:
+        disk = psutil.disk_io_counters(nowrap=True)
+        snapshot['disk'] = (disk.read_bytes, disk.write_bytes)
+    if 'net' not in snapshot:
         if network_interface_set == False:
-            net_start = psutil.net_io_counters()
-            time.sleep(REFRESH_RATE)
-            net_finish = psutil.net_io_counters()
+            net = psutil.net_io_counters()
         else:
-            nic_isup = psutil.net_if_stats()[NETWORK_INTERFACE].isup
-            net_start = psutil.net_io_counters(pernic=True, nowrap=True)[NETWORK_INTERFACE]
-            time.sleep(REFRESH_RATE)
-            net_finish = psutil.net_io_counters(pernic=True, nowrap=True)[NETWORK_INTERFACE]
-        network_sent = abs(net_finish.bytes_sent - net_start.bytes_sent) / REFRESH_RATE
-        network_recv = abs(net_finish.bytes_recv - net_start.bytes_recv) / REFRESH_RATE
-        y_data[3][0].append(network_recv / 1048576)
-        y_data[3][1].append(network_sent / 1048576)
-        if nic_isup == True:
-            current_data[4] = f"▼ {bytes2human(network_recv)}/s"
-            current_data[5] = f"▲ {bytes2human(network_sent)}/s"
+            net = psutil.net_io_counters(pernic=True, nowrap=True)[NETWORK_INTERFACE]
+        snapshot['net'] = (net.bytes_recv, net.bytes_sent)
+    if 'nic_isup' not in snapshot:
+        if network_interface_set == False:
+            snapshot['nic_isup'] = True
         else:
-            current_data[4] = "⚠️ !!! NETWORK"
-            current_data[5] = "DOWN !!! ⚠️"
-    
+            snapshot['nic_isup'] = psutil.net_if_stats()[NETWORK_INTERFACE].isup
+    return snapshot
+
+def cpu_busy_total(times) -> tuple:
+    '''
+    Splits a psutil.cpu_times() reading into (busy, total) seconds, the same way psutil.cpu_percent() does.
+    Linux already counts guest time as user time, and iowait counts as idle.
+    '''
+    total = sum(times) - getattr(times, 'guest', 0) - getattr(times, 'guest_nice', 0)
+    busy = total - times.idle - getattr(times, 'iowait', 0)
+    return busy, total
+
+def cpu_usage(start: tuple, finish: tuple) -> float:
+    ''' CPU utilization (%) between two (busy, total) readings. '''
+    if finish[1] <= start[1]:
+        return 0.0
+    usage = (finish[0] - start[0]) / (finish[1] - start[1]) * 100
+    return round(min(max(usage, 0.0), 100.0), 1)
+
+def read_cpu_temp() -> float:
+    ''' Current CPU temperature (°C) from our open sensor file, or from psutil if we don't have one. '''
+    global cpu_temp_file
+    if cpu_temp_file is not None:
+        try:
+            return int(cpu_temp_file.read()) / 1000
+        except (OSError, ValueError):
+            cpu_temp_file.close()
+            cpu_temp_file = None
+    return psutil.sensors_temperatures()[CPU_TEMP_SENSOR][0].current
+
+def sample_metrics() -> dict:
+    '''
+    Takes a snapshot of our counters and works out CPU usage and disk/network rates against the previous snapshot
+    using the time that actually passed between them, so the rates stay correct even if a loop runs long.
+    Also reads array and memory usage. Returns everything in the form apply_metrics() (and the metrics log) use:
+    - 'cpu': CPU usage (%), 'cpu_freq': GHz, 'cpu_temp': °C or None
+    - 'disk': (read, write), 'net': (received, sent), both bytes/s, 'nic_isup': True/False
+    - 'array', 'memory': (used bytes, total bytes, percent)
+    - 'cores': per-core CPU usage (%)
+    - 'time': wall clock time the sample was taken
+    '''
+    global last_snapshot
+    start = last_snapshot
+    finish = take_snapshot()
+    last_snapshot = finish
+    elapsed = finish['time'] - start['time']
+    if cpu_temp_available == False:
+        cpu_temp = None
+    else:
+        cpu_temp = read_cpu_temp()
+    if array_valid == True:
+        array_use = psutil.disk_usage(ARRAY_PATH)
+    else:
+        array_use = psutil.disk_usage('/')
+    memory_use = psutil.virtual_memory()
+    return {
+        'cpu': cpu_usage(start['cpu'], finish['cpu']),
+        'cpu_freq': round(psutil.cpu_freq().current / 1000, 2),
+        'cpu_temp': cpu_temp,
+        'disk': (abs(finish['disk'][0] - start['disk'][0]) / elapsed, abs(finish['disk'][1] - start['disk'][1]) / elapsed),
+        'net': (abs(finish['net'][0] - start['net'][0]) / elapsed, abs(finish['net'][1] - start['net'][1]) / elapsed),
+        'nic_isup': finish['nic_isup'],
+        'array': (array_use.used, array_use.total, array_use.percent),
+        'memory': (memory_use.total - memory_use.available, memory_use.total, memory_use.percent),
+        'cores': [cpu_usage(core_start, core_finish) for core_start, core_finish in zip(start['cores'], finish['cores'])],
+        'time': finish['time'] + WALL_CLOCK_OFFSET,
+    }
+
+resource_usage: dict = {'array': (0, 0, 0.0), 'memory': (0, 0, 0.0)}
+''' Latest array and memory usage as (used bytes, total bytes, percent), set by apply_metrics() '''
+
+def update_readouts(tick: dict) -> None:
+    ''' Updates the text readouts (current_data[] and resource_usage) from a sample in the form sample_metrics() returns '''
+    current_data[0] = f"{tick['cpu']}% {tick['cpu_freq']} GHz"
+    if tick['cpu_temp'] is None:
+        current_data[1] = None
+    else:
+        current_data[1] = f"{round(tick['cpu_temp'], 1)}°C"
+    iospeed_read, iospeed_write = tick['disk']
+    current_data[2] = f"R:{bytes2human(iospeed_read)}/s"
+    current_data[3] = f"W:{bytes2human(iospeed_write)}/s"
+    network_recv, network_sent = tick['net']
+    if tick['nic_isup'] == True:
+        current_data[4] = f"▼ {bytes2human(network_recv)}/s"
+        current_data[5] = f"▲ {bytes2human(network_sent)}/s"
+    else:
+        current_data[4] = "⚠️ !!! NETWORK"
+        current_data[5] = "DOWN !!! ⚠️"
+    resource_usage['array'] = tick['array']
+    resource_usage['memory'] = tick['memory']
+
+def apply_metrics(tick: dict) -> None:
+    '''
+    Turns one sample from sample_metrics() (or a metrics log) into what update_plot() shows:
+    appends to our history and updates current_data[], cpu_percs_cores and resource_usage.
+    General form is:
+           history.append([[plot 0 line 0, plot 0 line 1], [plot 1 line 0], ...])
+    '''
+    global cpu_percs_cores
+    update_readouts(tick)
+    cpu_percs_cores = tick['cores']
+
+    peak = tick.get('peak', tick) # see combine_samples()
+    history.append([
+        [peak['cpu'], peak['cpu_temp']],
+        [1], # we want a max y-value of 1 for this plot
+        [peak['disk'][0] / 1048576, peak['disk'][1] / 1048576], # MiB/s
+        [peak['net'][0] / 1048576, peak['net'][1] / 1048576],
+        [],
+    ], tick['time'])
+
+def update_data() -> None:
+    '''
+    Generates data for our plot.
+    Takes a sample every SAMPLE_RATE tick (see TickScheduler and sample_tick()) until it's time for the next frame,
+    then rolls them up into one (see combine_samples()) and hands that to apply_metrics().
+    Ticks we were too late for are skipped and whole frames we missed are left as gaps in the history;
+    the samples we do take cover all the time since the last one.
+    With METRICS_RECORD every frame's sample is also logged; with METRICS_REPLAY samples come from the log instead,
+    without waiting, so the log plays back as fast as we can render it.
+    '''
+    if metrics_replay is not None:
+        replay_sample()
+        return
+    start_sampler()
+    while True:
+        ticks = tick_scheduler.ticks
+        tick_scheduler.wait()
+        if sample_tick(ticks) == True:
+            return
+
+async def update_data_async() -> None:
+    ''' update_data() for LOOP_MODE: asyncio; waits for each tick on the event loop, then samples in our thread pool. '''
+    if metrics_replay is not None:
+        await run_stage(replay_sample)
+        return
+    start_sampler()
+    while True:
+        ticks = tick_scheduler.ticks
+        await tick_scheduler.wait_async()
+        if await run_stage(sample_tick, ticks) == True:
+            return
+
+samples_per_frame: int = 1
+''' How many SAMPLE_RATE ticks make up one frame (REFRESH_RATE), set by start_sampler() '''
+pending_samples: list = []
+''' Samples taken since the last frame '''
+
+def start_sampler() -> None:
+    '''
+    Takes our first counter snapshot and starts the tick schedule, if that hasn't happened yet.
+    SAMPLE_RATE is rounded so a whole number of samples fits in each frame.
+    '''
+    global last_snapshot, tick_scheduler, samples_per_frame
+    if last_snapshot is None:
+        last_snapshot = take_snapshot()
+    if tick_scheduler is None:
+        samples_per_frame = max(round(REFRESH_RATE / SAMPLE_RATE), 1)
+        tick_scheduler = TickScheduler(REFRESH_RATE / samples_per_frame)
+        if DEBUG == True and samples_per_frame > 1:
+            print(f"• Sampling every {round(tick_scheduler.period, 3)}s, {samples_per_frame} samples per frame ({SAMPLE_AGGREGATE} in the plots)")
+
+def sample_tick(ticks: int) -> bool:
     '''
-    This was the old way of threading; this was much slower
-    Kept here for notoriety.
-    '''
-    # t1 = threading.Thread(target=cpu_data_load, name='CPU Poller', daemon=True)
-    # t2 = threading.Thread(target=cpu_data_core, name='CPU Core Poller', daemon=True)
-    # t3 = threading.Thread(target=disk_data, name='Disk Poller', daemon=True)
-    # t4 = threading.Thread(target=network_data, name='Network Poller', daemon=True)
-    # t1.start() ; t2.start() ; t3.start() ; t4.start()
-    # t1.join() ; t2.join() ; t3.join() ; t4.join()
-
-    '''
-    Gather stats over REFRESH_RATE instead of waiting for each one sequentially
-    and use the thread pool
-    '''
-    cpupoll = mainpool.submit(cpu_data_load)
-    cpucorepoll = mainpool.submit(cpu_data_core)
-    diskpoll = mainpool.submit(disk_data)
-    networkpoll = mainpool.submit(network_data)
-    try: # block until all threads finish
-        _ = cpupoll.result(timeout=timeout_wait[0])
-        _ = cpucorepoll.result(timeout=timeout_wait[0])
-        _ = diskpoll.result(timeout=timeout_wait[0])
-        _ = networkpoll.result(timeout=timeout_wait[0])
-    except TimeoutError:
-        # relay it to our calling function
+    The sampling half of update_data(), for when a tick is due. `ticks` is where the schedule was before waiting,
+    so we can tell how many ticks were skipped and whether a frame boundary went by.
+    Returns True once the samples for a frame are done and applied.
+    '''
+    frames = tick_scheduler.ticks // samples_per_frame - ticks // samples_per_frame
+    ''' frame boundaries passed since the last tick; more than 1 means we missed whole frames '''
+    try:
+        tick = sample_metrics()
+        pending_samples.append(tick)
+    except SystemExit:
+        return True
+    except:
+        if DEBUG == True:
+            print_stderr("• Notice: Failed to read system stats this sample.")
+    if frames == 0:
+        if TEXT_REFRESH_RATE is not None and pending_samples:
+            update_readouts(combine_samples(pending_samples)) # the readouts so far this frame, see refresh_text()
+        return False
+    if frames > 1:
+        history.skip(frames - 1)
         if DEBUG == True:
-            print_stderr("• Notice: Worker threads timed out.")
-        raise TimeoutError
+            print_stderr(f"• Notice: Running late, skipped {frames - 1} sample(s).")
+    if not pending_samples:
+        return True
+    tick = combine_samples(pending_samples)
+    pending_samples.clear()
+    try:
+        if metrics_recorder is not None:
+            metrics_recorder.write(tick)
+        apply_metrics(tick)
     except SystemExit:
-        return
+        pass
     except:
+        if DEBUG == True:
+            print_stderr("• Notice: Failed to read system stats this sample.")
+    return True
+
+def replay_sample() -> None:
+    ''' update_data() for METRICS_REPLAY: the next sample from the log '''
+    tick = metrics_replay.next()
+    if tick is None:
+        return
+    try:
+        apply_metrics(tick)
+    except SystemExit:
         return
-    #print(f"DEBUG: polling took {round((time.time() - (data_start + REFRESH_RATE)), 3)} seconds ---")
+    except:
+        if DEBUG == True:
+            print_stderr("• Notice: Failed to read system stats this sample.")
+
+def combine_samples(ticks: list) -> dict:
+    '''
+    Rolls up the samples taken for one frame into a single one in the same form as sample_metrics().
+    The readouts get the average over the frame. With SAMPLE_AGGREGATE: max, the peak of every plotted value
+    is added as 'peak' so short bursts still show up in the plots. Everything else comes from the latest sample.
+    '''
+    if len(ticks) == 1:
+        return ticks[0]
+    tick = dict(ticks[-1])
+    temperatures = [sample['cpu_temp'] for sample in ticks if sample['cpu_temp'] is not None]
+    tick['cpu'] = round(float(np.mean([sample['cpu'] for sample in ticks])), 1)
+    tick['cpu_freq'] = round(float(np.mean([sample['cpu_freq'] for sample in ticks])), 2)
+    tick['cpu_temp'] = float(np.mean(temperatures)) if temperatures else None
+    tick['disk'] = tuple(np.mean([sample['disk'] for sample in ticks], axis=0).tolist())
+    tick['net'] = tuple(np.mean([sample['net'] for sample in ticks], axis=0).tolist())
+    tick['cores'] = np.around(np.mean([sample['cores'] for sample in ticks], axis=0), 1).tolist()
+    if SAMPLE_AGGREGATE == "max":
+        tick['peak'] = {
+            'cpu': max(sample['cpu'] for sample in ticks),
+            'cpu_temp': max(temperatures) if temperatures else None,
+            'disk': tuple(np.max([sample['disk'] for sample in ticks], axis=0).tolist()),
+            'net': tuple(np.max([sample['net'] for sample in ticks], axis=0).tolist()),
+        }
+    return tick
+
+VOLATILE_TEXTS: tuple = ('uptime', 'debug', 'frame_number')
+''' Overlay text that changes every frame no matter what. Left out of frame_signature(), FORCE_REFRESH keeps it up to date. '''
+
+def frame_signature(overlay: dict, y_data, ylims: dict, sizes: dict, bar_values: tuple) -> bytes:
+    '''
+    A fingerprint of what a frame shows, at the resolution it's shown at: the overlay text (minus VOLATILE_TEXTS),
+    where every point of every line lands in pixels, the heatmap's colors and the length of the bars in pixels.
+    Frames with the same signature look the same apart from the clock.
+    - y_data[plot] = that plot's lines, ylims[plot] = (bottom, top), sizes[plot] = (width, height) in pixels;
+      only the plots in ylims are looked at
+    '''
+    digest = hashlib.sha1()
+    for name, text in overlay.items():
+        if name not in VOLATILE_TEXTS:
+            digest.update(text.encode() + b'\0')
+    x_span = history.sample_time * (history.window - 1) # the same window the renderers put the points across
+    for plot, (bottom, top) in ylims.items():
+        width, height = sizes[plot]
+        if x_span > 0:
+            ages = history.ages(plot_width(plot))
+            digest.update(np.rint((1 - ages / x_span) * (width - 1)).astype(np.int16).tobytes())
+        for values in y_data[plot]:
+            rows = np.rint((np.asarray(values, dtype=np.float32) - bottom) * ((height - 1) / (top - bottom)))
+            digest.update(np.nan_to_num(np.clip(rows, -1, height), nan=-2).astype(np.int16).tobytes())
+    digest.update(np.rint(np.asarray(cpu_percs_cores, dtype=np.float32) * 2.55).astype(np.uint8).tobytes()) # 256 colors from 0-100%
+    digest.update(np.rint(np.asarray(bar_values, dtype=np.float32) * (disp.width / 100)).astype(np.int16).tobytes())
+    return digest.digest()
+
+last_signature = None
+''' frame_signature() of the last frame we drew '''
+frames_since_refresh: int = 0
+frame_unchanged: bool = False
+''' True if update_plot() didn't draw anything new, so plot_renderer() has nothing to send '''
+
+def frame_changed(signature: bytes) -> bool:
+    '''
+    Decides if this frame gets drawn: only if its signature differs from the last one drawn,
+    or every FORCE_REFRESH frames regardless so the clock keeps up. Everything gets drawn while the profiler runs
+    so it measures real frames. Sets frame_unchanged for plot_renderer().
+    '''
+    global last_signature, frames_since_refresh, frame_unchanged
+    frames_since_refresh += 1
+    frame_unchanged = (signature == last_signature and frames_since_refresh < FORCE_REFRESH
+                       and (PROFILING == False or samples > PROFILER_COUNT))
+    if frame_unchanged == False:
+        last_signature = signature
+        frames_since_refresh = 0
+    return not frame_unchanged
+
+AUTOSCALE_STEPS: tuple = (1, 1.2, 1.5, 2, 2.5, 3, 4, 5, 6, 8)
+''' Where the top of an autoscaled plot can go (times a power of 10) with AUTOSCALE: nice '''
+AUTOSCALE_MARGIN: float = 0.05
+''' Headroom over the highest value, same as matplotlib's default margins '''
+AUTOSCALE_HYSTERESIS: float = 0.8
+''' A plot only scales back down to a limit the data (plus margin) fills no more than this much of '''
+
+class AutoScale:
+    '''
+    y-limits of a plot without a 'ylim' for AUTOSCALE: nice. Works from the plot's peak (HistoryStore.peak())
+    instead of going through all of its data, and the top only takes AUTOSCALE_STEPS values: it goes up
+    as soon as the data needs it but comes back down only with room to spare (AUTOSCALE_HYSTERESIS),
+    so the axis and its tick labels stay put while the peak moves around within a step.
+    '''
+
+    def __init__(self):
+        self.ylim: tuple = None
+
+    @staticmethod
+    def step_above(value: float) -> float:
+        ''' The smallest of AUTOSCALE_STEPS (times a power of 10) that's at least `value` '''
+        if not value > 0: # nothing to show (or all missing)
+            return 1
+        magnitude = 10 ** np.floor(np.log10(value))
+        top = next((step * magnitude for step in AUTOSCALE_STEPS if step * magnitude >= value), 10 * magnitude)
+        return float(f"{top:.6g}") # 0.12 rather than 0.12000000000000001
+
+    def update(self, peak: float) -> bool:
+        ''' Works out the limits for `peak`. Returns True if they changed. '''
+        needed = peak * (1 + AUTOSCALE_MARGIN)
+        top = self.step_above(needed)
+        if self.ylim is not None and top <= self.ylim[1]:
+            # only come down with room to spare, so a peak hovering around a step doesn't flip back and forth
+            top = self.step_above(needed / AUTOSCALE_HYSTERESIS)
+            if top >= self.ylim[1]:
+                return False
+        self.ylim = (0, top)
+        return True
+
+autoscales: dict = {plot: AutoScale() for plot in (0, 2, 3) if 'ylim' not in PLOT_CONFIG[plot]}
+''' Plots we scale to their data and their limits, see AutoScale '''
 
 def update_plot() -> None:
     '''
     Read the last polled data generated by update_data(), update all corresponding elements
     in our plot, then generate an updated plot buffer. This will run as soon as update_data() is started
-    so that while the workers spawned by update_data() are sleeping we can focus on generating the plot. 
-    This has the effect of the workers being able to monitor the load this thread imposes.
+    so that while update_data() is sleeping we can focus on generating the plot. 
+    This has the effect of the sampler being able to monitor the load this thread imposes.
+    With RENDER_PROCESS this is done by the render process instead, see request_frame().
     - thread_id = 0
     '''
+    global drawn_texts
+    if render_process is not None:
+        request_frame()
+        return
     plot_start = time.time()
-    # gather system stats
-    uptime = f"Uptime: {timedelta_clean(time.monotonic())}"
-    if array_valid == True:
-        array_use = psutil.disk_usage(ARRAY_PATH)
-    else:
-        array_use = psutil.disk_usage('/')
-    array_total = bytes2human(array_use.total)
-    array_used = bytes2human(array_use.used)
-    array_str = f"{array_used} / {array_total} ({array_use.percent}%)"
-    memory_use = psutil.virtual_memory()
-    memory_total = bytes2human(memory_use.total)
-    memory_used = bytes2human(memory_use.total - memory_use.available)
-    memory_str = f"{memory_used} / {memory_total} ({memory_use.percent}%)"
+    overlay = overlay_text()
+    array_percent = resource_usage['array'][2]
+    memory_percent = resource_usage['memory'][2]
+
+    if RENDER_BACKEND == "numpy":
+        y_data = [history.plot(plot, plot_width(plot)) for plot in range(len(PLOT_CONFIG))]
+        if AUTOSCALE == "nice":
+            for plot, scale in autoscales.items():
+                if scale.update(history.peak(plot)) == True:
+                    engine.ylims[plot] = scale.ylim
+        if FORCE_REFRESH != 0:
+            ylims = {plot: engine.autoscale(plot, [np.asarray(line, dtype=np.float32) for line in y_data[plot]]) for plot in (0, 2, 3)}
+            sizes = {plot: engine.boxes[plot][2:] for plot in (0, 2, 3)}
+            if frame_changed(frame_signature(overlay, y_data, ylims, sizes, (array_percent, memory_percent))) == False:
+                thread_timer(plot_start, time.time(), 0)
+                return
+        engine.texts.update(overlay)
+        engine.render(y_data, cpu_percs_cores, (array_percent, memory_percent), history.ages(plot_width(0)),
+                      history.newest(plot_width(0)))
+        drawn_texts = overlay
+        thread_timer(plot_start, time.time(), 0)
+        return
 
     # update lines with latest data
     with threading.Lock(): # lock variables just in case
@@ -853,63 +2389,393 @@ def update_plot() -> None:
             if plot == 1 or plot == 4: # don't plot over our non-graph subplots
                 continue
             for index, line in enumerate(lines):
-                line.set_ydata(y_data[plot][index])
+                line.set_data(history.ages(plot_width(plot)), history.series(plot, index, plot_width(plot)))
             # autoscale if not specified
-            if 'ylim' not in PLOT_CONFIG[plot].keys():
+            if AUTOSCALE == "nice" and plot in autoscales:
+                if autoscales[plot].update(history.peak(plot)) == True:
+                    ax[plot].set_ylim(autoscales[plot].ylim)
+                    invalidate_background() # the tick labels changed
+            elif 'ylim' not in PLOT_CONFIG[plot].keys():
+                last_ylim = ax[plot].get_ylim()
                 ax[plot].relim() # recompute data limits             
                 ax[plot].autoscale(enable=True, axis='y') # reenable
                 ax[plot].set_ylim(bottom=0) # this leaves y max untouched and sets autoscale off
                 ax[plot].autoscale_view(scalex=False) # scale the plot
+                if ax[plot].get_ylim() != last_ylim:
+                    invalidate_background() # the tick labels changed
 
         # update our heatmap
         heatmap.set_data(np.matrix(cpu_percs_cores))
         # update our barplot
-        barplot[0].set_width(array_use.percent)
-        barplot[1].set_width(memory_use.percent)
+        barplot[0].set_width(array_percent)
+        barplot[1].set_width(memory_percent)
         ''' original setup; this WILL cause a memory leak '''
         # ax[1].pcolormesh([cpu_percs_cores], cmap='hot', vmin=0, vmax=100)
         # ax[4].barh(1, array_use.percent, facecolor='#375e1f')
         # ax[4].barh(2, memory_use.percent, facecolor='#4a2a7a')
         
-        # update text in plots with last polled data
-        if current_data[1] == None:
-            cpu_text.set_text(current_data[0])
+        # update text in plots
+        for name, text in overlay.items():
+            overlay_texts[name].set_text(text)
+
+        if FORCE_REFRESH != 0:
+            graphs = (0, 2, 3)
+            y_data = {plot: [line.get_ydata() for line in plot_lines[plot]] for plot in graphs}
+            ylims = {plot: ax[plot].get_ylim() for plot in graphs}
+            sizes = {plot: (ax[plot].bbox.width, ax[plot].bbox.height) for plot in graphs}
+            if frame_changed(frame_signature(overlay, y_data, ylims, sizes, (array_percent, memory_percent))) == False:
+                thread_timer(plot_start, time.time(), 0)
+                return
+
+    ''' Draw the plots. This can get really slow, so only redraw what changed if we can. '''
+    draw_figure()
+    drawn_texts = overlay
+    thread_timer(plot_start, time.time(), 0)
+
+def overlay_text() -> dict:
+    ''' The text readouts for the next frame from the last polled data, by the names in overlay_texts '''
+    # gather system stats
+    uptime = f"Uptime: {timedelta_clean(time.monotonic())}"
+    array_used, array_total, array_percent = resource_usage['array']
+    array_str = f"{bytes2human(array_used)} / {bytes2human(array_total)} ({array_percent}%)"
+    memory_used, memory_total, memory_percent = resource_usage['memory']
+    memory_str = f"{bytes2human(memory_used)} / {bytes2human(memory_total)} ({memory_percent}%)"
+
+    # text in plots with last polled data
+    if current_data[1] == None:
+        cpu_str = current_data[0]
+    else:
+        cpu_str = f"{current_data[0]} | {current_data[1]}"
+    overlay = {
+        'cpu': cpu_str,
+        'disk': f"{current_data[2]} | {current_data[3]}",
+        'storage': array_str,
+        'memory': memory_str,
+        'network': f"{current_data[4]} | {current_data[5]}",
+        'uptime': uptime,
+    }
+    if DEBUG == True:
+        if not current_data[-1]:
+            overlay['debug'] = "Last render: 0ms"
         else:
-            cpu_text.set_text(f"{current_data[0]} | {current_data[1]}")
-        disk_text.set_text(f"{current_data[2]} | {current_data[3]}")
-        storage_text.set_text(array_str)
-        memory_text.set_text(memory_str)
-        network_text.set_text(f"{current_data[4]} | {current_data[5]}")
-        uptime_text.set_text(uptime)        
-        if DEBUG == True:
-            if not current_data[-1]:
-                debug_text.set_text("Last render: 0ms")
+            if PROFILE_DISPLAY_RENDER == 0:
+                overlay['debug'] = f"Last plot gen: {round(current_data[-1] * 1000, 1)}ms"
             else:
-                if PROFILE_DISPLAY_RENDER == 0:
-                    debug_text.set_text(f"Last plot gen: {round(current_data[-1] * 1000, 1)}ms")
-                else:
-                    debug_text.set_text(f"Last render: {round(current_data[-1] * 1000, 1)}ms")
-            frame_number_text.set_text(f"{samples},{dropped_frames} | {timedelta_clean(time.time()-START_TIME)}")
-            
-    ''' Draw the plots. This can get really slow; can definitely use blitting (eventually) '''
-    canvas = plt.get_current_fig_manager().canvas
-    canvas.draw()
-    thread_timer(plot_start, time.time(), 0)
+                overlay['debug'] = f"Last render: {round(current_data[-1] * 1000, 1)}ms"
+        overlay['frame_number'] = f"{samples},{dropped_frames} | {timedelta_clean(time.time()-START_TIME)}"
+    return overlay
+
+def draw_figure() -> None:
+    '''
+    Render our figure into the canvas buffer. When blitting, the static parts of the figure
+    (titles, ticks, spines) are only drawn when the background needs to be recaptured;
+    every other frame restores the cached background and redraws just the artists in blit_artists and blit_texts.
+    With TEXT_REFRESH_RATE the frame is also kept without its text for draw_text().
+    '''
+    global blit_background, text_underlay
+    canvas = fig.canvas
+    if BLITTING == False:
+        canvas.draw()
+        return
+    if blit_background is None:
+        canvas.draw() # skips our animated artists
+        blit_background = canvas.copy_from_bbox(fig.bbox)
+    else:
+        canvas.restore_region(blit_background)
+    for artist in blit_artists:
+        fig.draw_artist(artist)
+    if TEXT_REFRESH_RATE is not None:
+        text_underlay = canvas.copy_from_bbox(fig.bbox)
+    draw_readouts()
+
+def draw_readouts() -> None:
+    ''' The last part of a blitted frame: the text readouts, then whatever sits on top of them '''
+    for artist in blit_texts:
+        fig.draw_artist(artist)
+    for artist in blit_overlays:
+        fig.draw_artist(artist)
+
+text_underlay = None
+''' With blitting and TEXT_REFRESH_RATE, the last frame drawn minus its text readouts '''
+drawn_texts: dict = {}
+''' The text readouts on the screen right now '''
+
+def draw_text(overlay: dict) -> bool:
+    '''
+    The fast path for TEXT_REFRESH_RATE: redraws just the text readouts on top of the last frame,
+    which is kept without its text (see draw_figure() and fastrender's render_text()). Much cheaper than a frame.
+    Returns False if the text hasn't changed or there's no frame to draw on (matplotlib needs BLITTING).
+    '''
+    global drawn_texts, last_signature
+    if overlay == drawn_texts:
+        return False
+    if RENDER_BACKEND == "numpy":
+        engine.texts.update(overlay)
+        if engine.render_text() == False:
+            return False
+    else:
+        if text_underlay is None or blit_background is None:
+            return False
+        for name, text in overlay.items():
+            overlay_texts[name].set_text(text)
+        fig.canvas.restore_region(text_underlay)
+        draw_readouts()
+    if any(overlay[name] != drawn_texts.get(name) for name in overlay if name not in VOLATILE_TEXTS):
+        last_signature = None # the screen no longer matches the last frame's signature
+    drawn_texts = overlay
+    return True
+
+MAX_RECTS: int = 4
+''' Most rectangles we'll send per frame. Every rectangle costs 3 extra SPI commands, so nearby changes get merged. '''
+RECT_MERGE_GAP: int = 8
+''' Changed rows that are this many rows apart or less get sent as one rectangle. '''
+FULL_FRAME_RATIO: float = 0.75
+''' If the rectangles cover more than this much of the screen, just send the whole frame. '''
+if RENDER_PROCESS == True:
+    # shared with the render process, which draws straight into them (see start_render_process())
+    rgb565_buffers: list = [memoryview(np.frombuffer(multiprocessing.RawArray('B', disp.width * disp.height * 2), dtype=np.uint8)) for _ in range(2)]
+else:
+    rgb565_buffers: list = [bytearray(disp.width * disp.height * 2) for _ in range(2)]
+''' Two reusable RGB565 frames (big-endian). We convert into one while the other holds what's on screen. '''
+rgb565_frames: list = [np.frombuffer(buffer, dtype=np.uint8).reshape(disp.height, disp.width, 2) for buffer in rgb565_buffers]
+''' numpy views of rgb565_buffers laid out as [row, column, (high byte, low byte)] '''
+rgb565_pixels: list = [frame.view(np.uint16)[..., 0] for frame in rgb565_frames]
+''' The same buffers again, one 16-bit value per pixel. Only used for comparing frames, so byte order doesn't matter. '''
+rgb565_scratch = np.empty((disp.height, disp.width), dtype=np.uint8)
+rgb565_changed = np.empty((disp.height, disp.width), dtype=bool)
+last_frame = None
+''' Index into rgb565_frames of the frame currently on the display. None = send a full frame next. '''
+
+def frame_to_rgb565(frame: np.ndarray, out: np.ndarray) -> None:
+    '''
+    Converts an RGB(A) frame buffer straight into `out` (one of rgb565_frames).
+    Same math as disp.image(), but without the PIL images or any new arrays:
+    high byte = RRRRRGGG, low byte = GGGBBBBB
+    The display handles rotation (see MADCTL_ROTATIONS) so the frame is used as-is.
+    '''
+    if frame.shape[:2] != out.shape[:2]:
+        raise ValueError(f"Image must match the dimensions of display ({disp.width}x{disp.height}).")
+    high, low = out[..., 0], out[..., 1]
+    np.bitwise_and(frame[..., 0], 0xF8, out=high)
+    np.right_shift(frame[..., 1], 5, out=rgb565_scratch)
+    np.bitwise_or(high, rgb565_scratch, out=high)
+    np.left_shift(frame[..., 1], 3, out=low) # the top 3 bits of green fall off here
+    np.bitwise_and(low, 0xE0, out=low)
+    np.right_shift(frame[..., 2], 3, out=rgb565_scratch)
+    np.bitwise_or(low, rgb565_scratch, out=low)
+
+def dirty_rects(old_frame: np.ndarray, new_frame: np.ndarray) -> list:
+    '''
+    Finds the regions that changed between two frames and returns them as a short list of
+    (x0, y0, x1, y1) rectangles, inclusive, ready for the display's window commands.
+    Rows that changed are grouped into bands, the closest bands are merged until there are
+    at most MAX_RECTS of them, then each band is trimmed to the columns that changed.
+    '''
+    changed = np.not_equal(old_frame, new_frame, out=rgb565_changed)
+    rows = np.flatnonzero(changed.any(axis=1))
+    if rows.size == 0:
+        return []
+    splits = np.flatnonzero(np.diff(rows) > RECT_MERGE_GAP)
+    starts = [rows[0]] + list(rows[splits + 1])
+    ends = list(rows[splits]) + [rows[-1]]
+    while len(starts) > MAX_RECTS:
+        gap = int(np.argmin(np.subtract(starts[1:], ends[:-1])))
+        del ends[gap], starts[gap + 1]
+    rects = []
+    for y0, y1 in zip(starts, ends):
+        columns = np.flatnonzero(changed[y0:y1 + 1].any(axis=0))
+        rects.append((int(columns[0]), int(y0), int(columns[-1]), int(y1)))
+    return rects
 
 def plot_renderer() -> None:
     '''
     Renders the plot buffer to display. This is usually the most CPU intense thread on faster systems.
+    The frame is packed into a preallocated RGB565 buffer and handed to the display as-is.
+    With PARTIAL_UPDATES, only the parts of the screen that changed since the last frame are sent.
     - thread_id = 1 
     '''
+    global skipped_frames
     render_start = time.time()
-    canvas = plt.get_current_fig_manager().canvas
-    # option 1
-    image = Image.frombuffer('RGBA', canvas.get_width_height(), canvas.buffer_rgba())
-    # option 2 (essentially the same as the above; same performance)
-    # image = Image.fromarray(np.asarray(canvas.buffer_rgba()))
-    disp.image(image, IMAGE_ROTATION) # this internally calls a numpy calculation
+    if frame_unchanged == True: # the display already shows this frame
+        skipped_frames += 1
+        thread_timer(render_start, time.time(), 1)
+        return
+    send_frame()
     thread_timer(render_start, time.time(), 1)
 
+display_lock = threading.Lock()
+''' One frame going out to the display at a time; a frame that timed out may still be sending when the next one starts '''
+
+def send_frame(partial: bool = None) -> None:
+    '''
+    The sending part of plot_renderer(), shared with refresh_text().
+    `partial` sends only what changed since the last frame; PARTIAL_UPDATES decides if it's not given.
+    '''
+    global last_frame, pixels_sent, pixels_rendered
+    with display_lock:
+        if render_process is not None:
+            source = None
+        elif RENDER_BACKEND == "numpy":
+            source = engine.frame
+        else:
+            source = np.asarray(fig.canvas.buffer_rgba()) # no copy, just a view of the canvas
+        current = 1 if last_frame == 0 else 0
+        frame = rgb565_frames[current]
+        if render_process is None: # otherwise the render process already put the frame there
+            frame_to_rgb565(source, frame)
+        height, width = frame.shape[:2]
+        full_frame = (0, 0, width - 1, height - 1)
+        if partial is None:
+            partial = PARTIAL_UPDATES
+        if partial == False or last_frame is None:
+            rects = [full_frame]
+        else:
+            rects = dirty_rects(rgb565_pixels[last_frame], rgb565_pixels[current])
+            area = sum((x1 - x0 + 1) * (y1 - y0 + 1) for x0, y0, x1, y1 in rects)
+            if area > (width * height * FULL_FRAME_RATIO):
+                rects = [full_frame]
+        for x0, y0, x1, y1 in rects:
+            if (x0, y0, x1, y1) == full_frame:
+                data = rgb565_buffers[current]
+            else:
+                data = frame[y0:y1 + 1, x0:x1 + 1].tobytes()
+            disp.block(x0, y0, x1, y1, data)
+            pixels_sent += (x1 - x0 + 1) * (y1 - y0 + 1)
+        disp.show()
+        pixels_rendered += width * height
+        last_frame = current
+
+text_scheduler = None
+''' Deadlines for refresh_text() when TEXT_REFRESH_RATE is set, made in main() '''
+text_refreshes: int = 0
+
+def refresh_text() -> None:
+    '''
+    Puts the latest readouts on screen between frames (TEXT_REFRESH_RATE), see draw_text().
+    Only the text changes, so only the boxes around the changed text get sent, even without PARTIAL_UPDATES;
+    otherwise every text refresh would cost as much to send as a whole frame.
+    '''
+    global text_refreshes
+    if render_process is not None:
+        drawn = request_frame(text_only=True)
+    else:
+        drawn = draw_text(overlay_text())
+    if drawn == True:
+        send_frame(partial=True)
+        text_refreshes += 1
+
+render_process = None
+''' Our render process if RENDER_PROCESS is enabled and it's running, see start_render_process() '''
+render_pipe = None
+render_process_info = None
+''' psutil.Process of the render process, for its CPU usage '''
+render_lock = threading.Lock()
+''' One frame request at a time; a request that timed out may still be waiting for its frame '''
+RENDER_PROCESS_TIMEOUT: float = max(REFRESH_RATE * 10, 10)
+''' Seconds to wait for a frame before deciding the render process is stuck (and stopping it) '''
+
+def start_render_process() -> None:
+    '''
+    Forks off a process that does update_plot() for us (RENDER_PROCESS), so drawing isn't fighting
+    the sampler and the display thread for the GIL and gets a core of its own.
+    It starts as a copy of us with the figure already set up and shares our history (see allocate_history()),
+    so all it needs per frame is a small snapshot of the latest text and values. It draws straight into
+    rgb565_frames, which are in shared memory, and plot_renderer() sends the frame from there.
+    '''
+    global render_process, render_pipe, render_process_info
+    context = multiprocessing.get_context('fork')
+    render_pipe, child_pipe = context.Pipe()
+    render_process = context.Process(target=render_loop, args=(child_pipe,), name="renderer", daemon=True)
+    render_process.start()
+    child_pipe.close()
+    render_process_info = psutil.Process(render_process.pid)
+    render_process_info.cpu_percent(interval=None)
+    if DEBUG == True:
+        print(f"• Rendering in a separate process (PID {render_process.pid})")
+
+def stop_render_process() -> None:
+    global render_process
+    if render_process is not None:
+        render_process.terminate()
+        render_process.join(1)
+        if render_process.is_alive():
+            render_process.kill()
+            render_process.join(1)
+        render_process = None
+
+def render_loop(pipe) -> None:
+    ''' What the render process runs: draws a frame for every request until we go away. '''
+    global render_process, cpu_percs_cores, samples, dropped_frames
+    render_process = None # we're it
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    while True:
+        try:
+            request = pipe.recv()
+        except (EOFError, OSError):
+            return
+        try:
+            current_data[:] = request['current_data']
+            cpu_percs_cores = request['cores']
+            resource_usage.update(request['resources'])
+            samples = request['samples']
+            dropped_frames = request['dropped_frames']
+            if request['text_only'] == True:
+                unchanged = not draw_text(overlay_text())
+            else:
+                update_plot()
+                unchanged = frame_unchanged
+            if RENDER_BACKEND == "numpy":
+                source = engine.frame
+            else:
+                source = np.asarray(fig.canvas.buffer_rgba())
+            if unchanged == False:
+                frame_to_rgb565(source, rgb565_frames[request['frame']])
+            pipe.send(unchanged)
+        except Exception as error:
+            pipe.send(f"{type(error).__name__}: {error}")
+
+def request_frame(text_only: bool = False) -> bool:
+    '''
+    update_plot() for RENDER_PROCESS: sends the latest data to the render process and waits for it to draw
+    the next frame into rgb565_frames. If the render process is gone, or hasn't answered in RENDER_PROCESS_TIMEOUT,
+    we stop it and go back to rendering ourselves.
+    With `text_only` it's draw_text() instead, and we return whether the text was drawn.
+    '''
+    global render_process, frame_unchanged
+    plot_start = time.time()
+    with render_lock:
+        try:
+            render_pipe.send({
+                'current_data': current_data,
+                'cores': cpu_percs_cores,
+                'resources': resource_usage,
+                'samples': samples,
+                'dropped_frames': dropped_frames,
+                'frame': 1 if last_frame == 0 else 0, # the one that isn't on the display
+                'text_only': text_only,
+            })
+            if render_pipe.poll(RENDER_PROCESS_TIMEOUT) == False:
+                raise TimeoutError
+            reply = render_pipe.recv()
+        except (EOFError, OSError) as error:
+            if isinstance(error, TimeoutError):
+                print_stderr("Warning: The render process stopped responding. Rendering in this process from now on.")
+            else:
+                print_stderr("Warning: The render process stopped. Rendering in this process from now on.")
+            stop_render_process()
+            if text_only == True:
+                return False # nothing of ours to draw the text on until the next frame
+            update_plot()
+            return True
+    if isinstance(reply, str):
+        raise RuntimeError(f"Render process failed: {reply}")
+    if text_only == True:
+        return not reply
+    frame_unchanged = reply
+    thread_timer(plot_start, time.time(), 0)
+    return not reply
+
 def plot_profiler(samples: int, sample_size: int):
     '''
     Profiles how long it takes to actually render the image on your specific hardware
@@ -940,6 +2806,8 @@ actual: {round((time.time() - START_TIME) - init_time, 2)}s):")
         print(f"   Screen render:       avg: {round(avg_render[1] * 1000, 1)}ms \
 | max/min/SD: {render_max[1]}/{render_min[1]}/{render_sd[1]}ms")
         print(f"   Full render average: {render_full}ms ({round((REFERENCE_RENDER_SPEED/render_full) * 100, 1)}% as fast as baseline)")
+        if DISPLAY == "emulator":
+            print(f"   Emulated SPI:        {disp.stats()}")
         del time_array, avg_render, render_sd, render_max, render_min
         return real_timeout
     elif samples > sample_size: # in case we use this past the polling amount
@@ -947,21 +2815,189 @@ actual: {round((time.time() - START_TIME) - init_time, 2)}s):")
     else:
         return
 
+def print_process_usage() -> None:
+    current_memory_usage = psutil.Process().memory_info().rss
+    this_process_cpu = this_process.cpu_percent(interval=None)
+    print(f"   CPU & memory usage:  {this_process_cpu}% \
+({round(this_process_cpu / CORE_COUNT, 3)}% overall CPU) | {bytes2human(current_memory_usage)}")
+
+def frame_timed_out() -> bool:
+    '''
+    Counts a frame that didn't finish in time and bails out if that keeps happening.
+    Every 10th one stretches timeout_wait by 25%; returns True when it did.
+    '''
+    global dropped_frames, timeout_wait
+    dropped_frames +=1
+    if DEBUG == True:
+        print_stderr(f"• Notice: Thread timeout #{dropped_frames}. Skipping next refresh.")
+    if dropped_frames > 40: # bail out
+        print_stderr("ERROR: Maximum timeouts exceeded.")
+        it_broke(1)
+    if (dropped_frames % 10) == 0:
+        timeout_wait = [round(timeout_wait[0] * 1.25, 4), round(timeout_wait[1] * 1.25, 4)]
+        print_stderr(f"Warning: Numerous timeouts ({dropped_frames}) detected. Adjusting internal runtime to compensate.")
+        return True
+    return False
+
+daily_event_timer = None
+''' stat update every 24 hours, started by main() '''
+cleanup_timer = None
+''' extra garbage collection every 10 hours, started by main() '''
+
+def frame_finished() -> bool:
+    '''
+    Bookkeeping after every frame in either LOOP_MODE: counts the sample, then runs the periodic clean up and stat update.
+    Returns False once a METRICS_REPLAY log has finished playing and we should stop.
+    '''
+    global samples
+    samples +=1
+
+    if metrics_replay is not None and metrics_replay.finished == True:
+        replay_time = round((time.time() - START_TIME) - init_time, 3)
+        print(f"--- Replay finished: {len(metrics_replay)} samples in {replay_time}s \
+({round(len(metrics_replay) / max(replay_time, 0.001), 1)} samples/s) with {dropped_frames} dropped sample(s) ---")
+        stop_render_process()
+        return False
+    
+    if cleanup_timer.due() == True:
+        gc.collect()
+    if daily_event_timer.due() == True:
+        gc.collect()
+        sample_actual_time = round(((time.time() - START_TIME) - init_time) * 1000 / samples, 3) # ms
+        current_memory_usage = psutil.Process().memory_info().rss
+        this_process_cpu = this_process.cpu_percent(interval=None)
+        print(f"\nℹ️ Periodic stat update @ {samples} samples \
+({timedelta_clean(time.time()-START_TIME)}):\n├ {dropped_frames} dropped sample(s) | \
+{tick_scheduler.missed if tick_scheduler is not None else 0} skipped tick(s) | {sample_actual_time}ms avg time/sample\
+\n├ {skipped_frames} unchanged frame(s) not redrawn | {text_refreshes} text refresh(es)\
+\n└ Avg CPU: {this_process_cpu}% ({round(this_process_cpu / CORE_COUNT, 3)}% overall) | \
+Current memory use: {bytes2human(current_memory_usage)}")
+        if DEBUG == True and pixels_rendered > 0:
+            print(f"• Display updates: sent {round(pixels_sent / pixels_rendered * 100, 1)}% of rendered pixels")
+        if DEBUG == True and DISPLAY == "emulator":
+            print(f"• Emulated SPI: {disp.stats()}")
+        if DEBUG == True and render_process is not None:
+            try:
+                print(f"• Render process: {render_process_info.cpu_percent(interval=None)}% CPU | \
+{bytes2human(render_process_info.memory_info().rss)} memory")
+            except psutil.Error:
+                pass
+    return True
+
+async def run_stage(function, *args, timeout: float = None) -> None:
+    '''
+    Runs one stage of a frame in our thread pool for LOOP_MODE: asyncio and waits for it to finish.
+    Every `timeout` (timeout_wait[0] by default) it's still going counts as a timed out frame, see frame_timed_out().
+    A thread can't be stopped partway, so rather than starting over we keep waiting on the same call:
+    nothing else is handed to the pool until it's done, so a hung stage ties up one thread instead of piling up more.
+    '''
+    job = asyncio.get_running_loop().run_in_executor(mainpool, function, *args)
+    while True:
+        try:
+            return await asyncio.wait_for(asyncio.shield(job), timeout if timeout is not None else timeout_wait[0])
+        except asyncio.TimeoutError:
+            frame_timed_out()
+
+def wait_for_sample(data_poller, timeout: float):
+    '''
+    data_poller.result() for the threaded main loop, refreshing the text (see refresh_text()) whenever
+    text_scheduler comes due while we wait. Raises TimeoutError if the sample isn't done within `timeout`.
+    '''
+    give_up = time.monotonic() + timeout
+    while text_scheduler is not None:
+        try:
+            return data_poller.result(timeout=max(min(text_scheduler.deadline, give_up) - time.monotonic(), 0))
+        except TimeoutError:
+            if time.monotonic() >= give_up:
+                raise
+            text_scheduler.advance()
+            refresh_text()
+    return data_poller.result(timeout=timeout)
+
+def render_frame() -> None:
+    ''' update_plot() then plot_renderer(), as one job for LOOP_MODE: asyncio '''
+    update_plot()
+    plot_renderer()
+
+async def sample_loop(new_sample: asyncio.Event, frame_drawn: asyncio.Event) -> None:
+    '''
+    Takes a sample every tick and lets render_loop_async() know. Waiting for a tick doesn't tie up a thread,
+    and a sample that's still going when the next tick is due makes us skip that tick (see TickScheduler).
+    A METRICS_REPLAY log is played back one sample per frame instead.
+    '''
+    while True:
+        if metrics_replay is not None:
+            await frame_drawn.wait()
+            frame_drawn.clear()
+        await update_data_async()
+        new_sample.set()
+
+async def render_loop_async(new_sample: asyncio.Event, frame_drawn: asyncio.Event) -> None:
+    '''
+    Draws and sends a frame whenever there's a new sample. If samples came in while we were busy,
+    only the latest is drawn: we never queue up frames we can't keep up with.
+    In between, the text is refreshed every TEXT_REFRESH_RATE (see refresh_text()).
+    Returns when a METRICS_REPLAY log is done.
+    '''
+    while True:
+        if text_scheduler is not None:
+            try:
+                await asyncio.wait_for(new_sample.wait(), max(text_scheduler.deadline - time.monotonic(), 0))
+            except asyncio.TimeoutError:
+                text_scheduler.advance()
+                await run_stage(refresh_text)
+                continue
+        await new_sample.wait()
+        new_sample.clear()
+        await run_stage(render_frame, timeout=sum(timeout_wait))
+        if PROFILE_DISPLAY_RENDER != 0 and PROFILE_DISPLAY_RENDER != 1:
+            current_data[-1] = np.sum(thread_time)
+        if PROFILING == True and samples <= PROFILER_COUNT:
+            if plot_profiler(samples, PROFILER_COUNT) is not None:
+                print_process_usage()
+        if frame_finished() == False:
+            return
+        frame_drawn.set()
+
+async def main_async() -> None:
+    '''
+    The main loop for LOOP_MODE: asyncio. Sampling and drawing are two tasks on one event loop that hand off
+    through events, and the actual work runs in our thread pool with a deadline (see run_stage()).
+    Instead of the threaded loop's adaptive timeouts each stage just gets timeout_wait, and a frame that's
+    running late holds back the next one instead of running alongside it.
+    '''
+    new_sample = asyncio.Event()
+    new_sample.set() # draw the sample main() took on startup
+    frame_drawn = asyncio.Event()
+    tasks = [asyncio.create_task(sample_loop(new_sample, frame_drawn)),
+             asyncio.create_task(render_loop_async(new_sample, frame_drawn))]
+    try:
+        done, _ = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+        for task in done:
+            task.result() # raise anything that went wrong
+    finally:
+        for task in tasks:
+            task.cancel()
+
 def main() -> None:
     ''' Loop until Docker shuts down or something breaks. '''
-    global samples, dropped_frames, timeout_wait, init_time
+    global samples, dropped_frames, timeout_wait, init_time, daily_event_timer, cleanup_timer, text_scheduler
     init_gc: int = gc.collect()
     if DEBUG == True:
         print(f"• Initialization cleanup: freed {init_gc} object(s).")
     del init_gc
+    startup_phase("cleanup")
     init_time = round(time.time() - START_TIME, 3)
     print(f"Setup took {init_time} seconds.")
+    print("  " + " | ".join(f"{name}: {round(seconds, 3)}s" for name, seconds in startup_phases))
     refresh_rate_limiter(abs(init_time))
     print(f"--- Monitoring started. Refresh rate: {REFRESH_RATE} second(s) | \
 Plot range: {round(REFRESH_RATE * (HIST_SIZE - 1),1)}s ({round(REFRESH_RATE * (HIST_SIZE - 1) / 60, 2)}min) ---")
     # register handler for SIGTERM
     signal.signal(signal.SIGTERM, sigterm_handler)
     update_data() # get initial stats on startup
+    if RENDER_PROCESS == True:
+        start_render_process()
 
     current_timeout = timeout_wait 
     ''' thread timeout adjusted per loop, initialized to timeout_wait, (seconds) '''
@@ -981,34 +3017,35 @@ Plot range: {round(REFRESH_RATE * (HIST_SIZE - 1),1)}s ({round(REFRESH_RATE * (H
         else:
             print("• Display will show full render time.")
 
-    daily_event_timer = int(86400 // REFRESH_RATE) # naive calculation for samples per 24 hours; initial value
-    event_timer_resync = int(36000 // REFRESH_RATE) # sub-timer to trigger daily_event_timer recalculation (~10 hours)
-    
+    daily_event_timer = TickScheduler(86400)
+    cleanup_timer = TickScheduler(36000)
+    if TEXT_REFRESH_RATE is not None:
+        text_scheduler = TickScheduler(TEXT_REFRESH_RATE)
+        if DEBUG == True:
+            print(f"• Refreshing the text every {TEXT_REFRESH_RATE}s between frames.")
+    if LOOP_MODE == "asyncio":
+        asyncio.run(main_async())
+        return
+
+    data_poller = None
     while True:
-        data_poller = mainpool.submit(update_data)
+        if data_poller is None or data_poller.done():
+            data_poller = mainpool.submit(update_data) # one that timed out is still sampling, keep waiting on it
         plotter = mainpool.submit(update_plot)
         try: # block until all threads finish
             _ = plotter.result(timeout=current_timeout[0])
             # wait for update_plot() to finish, then send the display renderer to the threadpool
             screen_render = mainpool.submit(plot_renderer)
             _ = screen_render.result(timeout=current_timeout[1])
-            _ = data_poller.result(timeout=timeout_wait[0]) # this should finish after the above threads are done
+            _ = wait_for_sample(data_poller, timeout_wait[0]) # this should finish after the above threads are done
 
         except TimeoutError:
-            dropped_frames +=1
-            if DEBUG == True:
-                print_stderr(f"• Notice: Thread timeout #{dropped_frames}. Skipping next refresh.")
-            if (dropped_frames % 10) == 0:
+            if frame_timed_out() == True:
                 # bump up baseline timeout values to help reduce timeouts
                 baseline_timeout = [round(baseline_timeout[0] * 1.25, 4), round(baseline_timeout[1] * 1.25, 4)]
-                timeout_wait = [round(timeout_wait[0] * 1.25, 4), round(timeout_wait[1] * 1.25, 4)]
-                print_stderr(f"Warning: Numerous timeouts ({dropped_frames}) detected. Adjusting internal runtime to compensate.")
                 if DEBUG == True:
                     print(f"• Updated baseline timeouts: {round(baseline_timeout[0] * 1000, 4)}ms, {round(baseline_timeout[1] * 1000, 4)}ms")
             time.sleep(REFRESH_RATE)
-            if dropped_frames > 40: # bail out
-                print_stderr("ERROR: Maximum timeouts exceeded.")
-                it_broke(1)
             continue
 
         except SystemExit:
@@ -1022,7 +3059,7 @@ Plot range: {round(REFRESH_RATE * (HIST_SIZE - 1),1)}s ({round(REFRESH_RATE * (H
         if PROFILING == True: # adjusts both baseline_timeout and current_timeout when plot_profiler() is done
             if samples > PROFILER_COUNT:
                 # dynamically adjust timeout based on CPU load
-                timeout_adjust = np.array(baseline_timeout) * (y_data[0][0][-1] / CPU_AFFECT_RATIO)
+                timeout_adjust = np.array(baseline_timeout) * (history.latest(0, 0) / CPU_AFFECT_RATIO)
                 current_timeout = np.around(baseline_timeout + timeout_adjust, 3)
             elif samples == 0:
                 plot_profiler(samples, PROFILER_COUNT)
@@ -1030,31 +3067,15 @@ Plot range: {round(REFRESH_RATE * (HIST_SIZE - 1),1)}s ({round(REFRESH_RATE * (H
                 plot_profiler(samples, PROFILER_COUNT)
             elif samples == PROFILER_COUNT:
                 baseline_timeout = plot_profiler(samples, PROFILER_COUNT)
-                current_memory_usage = psutil.Process().memory_info().rss
-                this_process_cpu = this_process.cpu_percent(interval=None)
-                print(f"   CPU & memory usage:  {this_process_cpu}% \
-({round(this_process_cpu / CORE_COUNT, 3)}% overall CPU) | {bytes2human(current_memory_usage)}")
+                print_process_usage()
                 if DEBUG == True:
                     print(f"• Got new baseline timeouts: \
 {round(baseline_timeout[0] * 1000, 4)}ms, {round(baseline_timeout[1] * 1000, 4)}ms (was {timeout_wait[0]}s)")
             else: 
                 pass
                 
-        samples +=1
-        
-        if (samples % event_timer_resync) == 0:
-            daily_event_timer = int(86400 // (((time.time() - START_TIME) - init_time) / samples))
-            gc.collect()
-        if (samples % daily_event_timer) == 0:
-            gc.collect()
-            sample_actual_time = round(((time.time() - START_TIME) - init_time) * 1000 / samples, 3) # ms
-            current_memory_usage = psutil.Process().memory_info().rss
-            this_process_cpu = this_process.cpu_percent(interval=None)
-            print(f"\nℹ️ Periodic stat update @ {samples} samples \
-({timedelta_clean(time.time()-START_TIME)}):\n├ {dropped_frames} dropped sample(s) | \
-{sample_actual_time}ms avg time/sample\
-\n└ Avg CPU: {this_process_cpu}% ({round(this_process_cpu / CORE_COUNT, 3)}% overall) | \
-Current memory use: {bytes2human(current_memory_usage)}")
+        if frame_finished() == False:
+            break
 
 # finally enter main loop
 if __name__ == '__main__':
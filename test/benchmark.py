@@ -0,0 +1,280 @@
+'''
+Benchmark for the UNRAID status screen.
+Imports main.py headlessly (DISPLAY: none, or the ILI9341 emulator) with made-up system stats
+(or a metrics log recorded with METRICS_RECORD, see --replay), then times update_data(), update_plot(),
+plot_renderer() and the RGB565 conversion on their own over many frames. Reports mean/p50/p95/p99/max,
+memory allocated per frame, how the full render compares to REFERENCE_RENDER_SPEED, and writes it all
+as JSON so versions can be compared.
+
+    python3 test/benchmark.py --backend numpy --iterations 500 --output numpy.json
+    python3 test/benchmark.py --backend numpy --compare numpy.json
+    python3 test/benchmark.py --replay incident.log
+
+Uses settings.yaml next to main.py as a starting point (or --settings), with the display, history file
+and cache overridden so nothing outside this process is touched.
+by: WeegeeNumbuh1
+'''
+import argparse
+import gc
+import json
+import math
+import os
+import platform
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+import numpy as np
+import yaml
+
+MAIN_DIR = Path(__file__).resolve().parent.parent
+STAGES: tuple = ('update_data', 'update_plot', 'plot_renderer', 'rgb565_conversion')
+
+class SyntheticMetrics:
+    '''
+    Stands in for main.take_snapshot() and main.read_cpu_temp(): counters that move like a busy server
+    (a slow CPU load wave with noise, bursty disk and network traffic) instead of whatever this machine is doing.
+    Seeded, so every run sees the same numbers.
+    '''
+
+    def __init__(self, cores: int, interval: float, seed: int = 0):
+        self.rng = np.random.default_rng(seed)
+        self.interval = interval
+        self.step = 0
+        self.time = 0.0
+        self.cores = [[0.0, 0.0] for _ in range(cores)]
+        self.disk = [0, 0]
+        self.net = [0, 0]
+        self.load = 0.0
+
+    def snapshot(self) -> dict:
+        self.step += 1
+        self.time += self.interval
+        self.load = 0.5 + 0.4 * math.sin(self.step / 20)
+        for core in self.cores:
+            core[0] += self.interval * min(max(self.load + self.rng.normal(0, 0.15), 0.0), 1.0)
+            core[1] += self.interval
+        for counters, scale in ((self.disk, 50 * 1048576), (self.net, 10 * 1048576)):
+            for index in range(2):
+                if self.rng.random() < 0.3: # traffic comes in bursts
+                    counters[index] += int(self.rng.exponential(scale) * self.interval)
+        return {
+            'time': self.time,
+            'cpu': (sum(core[0] for core in self.cores), sum(core[1] for core in self.cores)),
+            'cores': [tuple(core) for core in self.cores],
+            'disk': tuple(self.disk),
+            'net': tuple(self.net),
+            'nic_isup': True,
+        }
+
+    def temperature(self) -> float:
+        return 40 + 25 * self.load + self.rng.normal(0, 0.5)
+
+def load_main(args: argparse.Namespace):
+    ''' Writes a settings file with our overrides, then imports main.py with it. '''
+    settings_path = args.settings if args.settings is not None else MAIN_DIR / "settings.yaml"
+    with open(settings_path, 'rb') as file:
+        settings = yaml.safe_load(file)
+    settings['DISPLAY'] = args.display
+    settings['DISPLAY_OUTPUT'] = "default"
+    settings['HISTORY_FILE'] = "none"
+    settings['METRICS_RECORD'] = "none"
+    settings['CACHE_DIR'] = "none"
+    settings['METRICS_REPLAY'] = args.replay if args.replay is not None else "none"
+    if args.backend is not None:
+        settings['RENDER_BACKEND'] = args.backend
+    if args.partial_updates is not None:
+        settings['PARTIAL_UPDATES'] = args.partial_updates
+    settings['RENDER_PROCESS'] = args.render_process
+    temp_dir = tempfile.mkdtemp(prefix="status-screen-benchmark-")
+    temp_settings = os.path.join(temp_dir, "settings.yaml")
+    with open(temp_settings, 'w') as file:
+        yaml.safe_dump(settings, file)
+    os.environ["STATUS_SCREEN_SETTINGS"] = temp_settings
+    sys.path.insert(0, str(MAIN_DIR))
+    import main
+    os.remove(temp_settings)
+    os.rmdir(temp_dir)
+    return main
+
+def summarize(times: list) -> dict:
+    ''' Timing stats in milliseconds '''
+    times = np.array(times) * 1000
+    return {
+        'mean_ms': round(float(np.mean(times)), 3),
+        'p50_ms': round(float(np.percentile(times, 50)), 3),
+        'p95_ms': round(float(np.percentile(times, 95)), 3),
+        'p99_ms': round(float(np.percentile(times, 99)), 3),
+        'max_ms': round(float(np.max(times)), 3),
+    }
+
+def run(args: argparse.Namespace) -> dict:
+    main = load_main(args)
+    metrics = SyntheticMetrics(main.CORE_COUNT, main.REFRESH_RATE, args.seed)
+    main.take_snapshot = metrics.snapshot
+    main.read_cpu_temp = metrics.temperature
+    main.cpu_temp_available = True
+    main.last_snapshot = None
+    refresh_rate = main.REFRESH_RATE
+    main.REFRESH_RATE = 0 # update_data() ticks this often (0 = no waiting), the made-up counters keep their own time
+
+    def update_data() -> None:
+        if main.metrics_replay is not None and main.metrics_replay.position >= len(main.metrics_replay):
+            main.metrics_replay.rewind() # loop the log if it's shorter than the benchmark
+        main.update_data()
+
+    def convert() -> None:
+        if main.RENDER_BACKEND == "numpy":
+            source = main.engine.frame
+        else:
+            source = np.asarray(main.fig.canvas.buffer_rgba())
+        main.frame_to_rgb565(source, main.rgb565_frames[0])
+
+    if main.RENDER_PROCESS == True:
+        main.update_data()
+        main.start_render_process()
+
+    stages = {'update_data': update_data, 'update_plot': main.update_plot,
+              'plot_renderer': main.plot_renderer, 'rgb565_conversion': convert}
+
+    for _ in range(args.warmup):
+        for stage in stages.values():
+            stage()
+    if args.display == "emulator":
+        main.disp.display.reset_counters()
+        main.disp.frames = 0
+
+    times = {name: [] for name in STAGES}
+    gc.collect()
+    for _ in range(args.iterations):
+        for name, stage in stages.items():
+            start = time.perf_counter()
+            stage()
+            times[name].append(time.perf_counter() - start)
+    spi = main.disp.stats() if args.display == "emulator" else None
+
+    # allocations are measured separately, tracemalloc slows everything down
+    peaks = {name: [] for name in STAGES}
+    retained = {name: [] for name in STAGES}
+    tracemalloc.start()
+    for _ in range(args.allocation_iterations):
+        for name, stage in stages.items():
+            before = tracemalloc.get_traced_memory()[0]
+            tracemalloc.reset_peak()
+            stage()
+            current, peak = tracemalloc.get_traced_memory()
+            peaks[name].append(peak - before)
+            retained[name].append(current - before)
+    tracemalloc.stop()
+    main.stop_render_process()
+
+    results = {}
+    for name in STAGES:
+        results[name] = summarize(times[name])
+        if args.allocation_iterations > 0:
+            results[name]['alloc_peak_kib'] = round(float(np.mean(peaks[name])) / 1024, 2)
+            results[name]['alloc_retained_kib'] = round(float(np.mean(retained[name])) / 1024, 2)
+    full_render = results['update_plot']['mean_ms'] + results['plot_renderer']['mean_ms']
+    report = {
+        'version': main.VERSION,
+        'date': time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        'system': {
+            'python': platform.python_version(),
+            'numpy': np.__version__,
+            'machine': platform.machine(),
+            'cpu_count': main.CORE_COUNT,
+        },
+        'config': {
+            'backend': main.RENDER_BACKEND,
+            'blitting': main.BLITTING,
+            'partial_updates': main.PARTIAL_UPDATES,
+            'render_process': main.RENDER_PROCESS,
+            'display': args.display,
+            'size': [main.disp.width, main.disp.height],
+            'refresh_rate': refresh_rate,
+            'plot_points': main.HIST_SIZE,
+            'iterations': args.iterations,
+            'warmup': args.warmup,
+            'allocation_iterations': args.allocation_iterations,
+            'seed': args.seed,
+            'replay': args.replay,
+        },
+        'startup_ms': {name: round(seconds * 1000, 1) for name, seconds in main.startup_phases},
+        'stages': results,
+        'full_render_ms': round(full_render, 3),
+        'reference_render_ms': main.REFERENCE_RENDER_SPEED,
+        'percent_of_reference': round(main.REFERENCE_RENDER_SPEED / full_render * 100, 1),
+    }
+    if spi is not None:
+        report['spi'] = {
+            'bytes_per_frame': round(main.disp.display.bytes / max(main.disp.frames, 1), 1),
+            'transactions_per_frame': round(main.disp.display.transactions / max(main.disp.frames, 1), 2),
+            'transfer_ms_per_frame': round(main.disp.display.simulated_time / max(main.disp.frames, 1) * 1000, 3),
+            'summary': spi,
+        }
+    return report
+
+def print_report(report: dict, previous: dict = None, tolerance: float = 0.1) -> bool:
+    ''' Prints a readable summary to stderr. Returns True if any stage got slower than `previous` by more than `tolerance`. '''
+    regressed = False
+    print(f"\nBenchmark: {report['version']} | {report['config']['backend']} backend | \
+{report['config']['iterations']} frames", file=sys.stderr)
+    for name, stats in report['stages'].items():
+        line = f"   {name:<18} mean: {stats['mean_ms']:>8.3f}ms | p95/p99/max: \
+{stats['p95_ms']}/{stats['p99_ms']}/{stats['max_ms']}ms"
+        if 'alloc_peak_kib' in stats:
+            line += f" | alloc: {stats['alloc_peak_kib']}KiB"
+        if previous is not None and name in previous.get('stages', {}):
+            change = stats['mean_ms'] / previous['stages'][name]['mean_ms'] - 1
+            line += f" | {change * 100:+.1f}%"
+            if change > tolerance:
+                line += " ⚠️"
+                regressed = True
+        print(line, file=sys.stderr)
+    print(f"   Full render average: {report['full_render_ms']}ms \
+({report['percent_of_reference']}% as fast as baseline)", file=sys.stderr)
+    if 'spi' in report:
+        print(f"   Emulated SPI:        {report['spi']['summary']}", file=sys.stderr)
+    return regressed
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Benchmark the status screen's sampling and render stages.")
+    parser.add_argument('--settings', help="settings file to start from (default: settings.yaml next to main.py)")
+    parser.add_argument('--backend', choices=("matplotlib", "numpy"), help="RENDER_BACKEND to use (default: from settings)")
+    parser.add_argument('--partial-updates', dest='partial_updates', action=argparse.BooleanOptionalAction,
+                        help="PARTIAL_UPDATES to use (default: from settings)")
+    parser.add_argument('--render-process', dest='render_process', action='store_true',
+                        help="draw in a separate process (RENDER_PROCESS); update_plot is then the round trip to it")
+    parser.add_argument('--display', choices=("none", "emulator"), default="none",
+                        help="display to render to; the emulator also reports SPI cost per frame (default: none)")
+    parser.add_argument('--iterations', type=int, default=300, help="frames to time (default: 300)")
+    parser.add_argument('--warmup', type=int, default=20, help="frames to run before timing (default: 20)")
+    parser.add_argument('--allocation-iterations', dest='allocation_iterations', type=int, default=30,
+                        help="frames to trace allocations for, 0 to skip (default: 30)")
+    parser.add_argument('--seed', type=int, default=0, help="seed for the made-up system stats (default: 0)")
+    parser.add_argument('--replay', help="play back this metrics log (METRICS_RECORD) instead of the made-up system stats")
+    parser.add_argument('--output', help="write the JSON report here instead of stdout")
+    parser.add_argument('--compare', help="JSON report from an earlier run to compare against")
+    parser.add_argument('--tolerance', type=float, default=0.1,
+                        help="how much slower (fraction) a stage can get before it counts as a regression (default: 0.1)")
+    return parser.parse_args()
+
+if __name__ == '__main__':
+    args = parse_args()
+    stdout = sys.stdout
+    sys.stdout = sys.stderr # main.py talks a lot, keep stdout for the report
+    report = run(args)
+    previous = None
+    if args.compare is not None:
+        with open(args.compare) as file:
+            previous = json.load(file)
+    regressed = print_report(report, previous, args.tolerance)
+    if args.output is not None:
+        with open(args.output, 'w') as file:
+            json.dump(report, file, indent=2)
+    else:
+        json.dump(report, stdout, indent=2)
+        stdout.write("\n")
+    sys.exit(1 if regressed else 0)